@@ -0,0 +1,171 @@
+"""
+Headless benchmark of the dashboard computations on synthetic data.
+
+    python dashboard/benchmark.py --scales 10000 100000 1000000 --output benchmark_report.json
+    python dashboard/benchmark.py --baseline benchmark_report.json
+
+Every stage is run --repeat times at every scale and its fastest time
+kept, along with the median and its peak traced memory. The `generate`
+stage runs once and reports the size of the generated frames instead.
+With --baseline, stages whose fastest time is slower than the baseline's
+by more than --tolerance are reported as regressions and the exit status
+is non-zero. Stages faster than the noise floor are not compared.
+"""
+import argparse
+import functools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from compute import product_popularity, rfm_top_customers, sales_summary
+from correlation import delivery_satisfaction
+from filters import build_filter_index
+from rfm import WINDOWS, compute_rfm
+from rollup import build_monthly_rollup
+from synthetic import generate
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+DEFAULT_REPEAT = 5
+# Baseline stages faster than this are too noisy to gate on
+NOISE_FLOOR_SECONDS = 0.02
+
+
+def measure(results, stage, func, *args, trace_memory=True, repeat=DEFAULT_REPEAT, **kwargs):
+    """
+    Run one stage `repeat` times, recording the fastest and median wall
+    time and the peak traced memory. The fastest run is the least disturbed
+    by the rest of the machine, so it is the one compared across reports.
+    Tracing slows down Python-level allocations, so the timed runs are
+    untraced and, with `trace_memory`, one more run under tracemalloc
+    gives the peak.
+    """
+    timings = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        value = func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    results[stage] = {
+        'seconds': round(min(timings), 6),
+        'median_seconds': round(float(np.median(timings)), 6),
+        'repeat': len(timings),
+        'peak_mb': None,
+    }
+
+    if trace_memory:
+        tracemalloc.start()
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[stage]['peak_mb'] = round(peak / 2**20, 3)
+    return value
+
+
+def run_scale(n_rows, seed=0, repeat=DEFAULT_REPEAT):
+    """
+    Benchmark every stage of the dashboard at one scale.
+    """
+    results = {}
+    timed = functools.partial(measure, repeat=repeat)
+    datasets = timed(results, 'generate', generate, n_rows, seed=seed, trace_memory=False, repeat=1)
+    orders_items_payments = datasets['orders_items_payments']
+    results['generate']['dataset_mb'] = round(
+        sum(df.memory_usage(deep=False).sum() for df in datasets.values()) / 2**20, 3
+    )
+
+    # Unified filter: index build, then the common selections
+    index = timed(results, 'filter.build_index', build_filter_index, orders_items_payments)
+    years, months = index.available_years, index.available_months
+    timed(results, 'filter.select_all', index.select, years, months)
+    timed(results, 'filter.select_year', index.select, years[-1:], months)
+    filtered = timed(results, 'filter.select_scattered', index.select, years, months[::3])
+
+    # Sales dashboard
+    rollup = timed(results, 'sales.build_rollup', build_monthly_rollup, orders_items_payments)
+    timed(results, 'sales.summary_all', sales_summary, rollup, years, months)
+    timed(results, 'sales.summary_scattered', sales_summary, rollup, years, months[::3])
+
+    # RFM dashboard
+    rfm = timed(results, 'rfm.compute_1_month', compute_rfm, orders_items_payments, window=WINDOWS["1 Month"])
+    timed(results, 'rfm.top_customers', rfm_top_customers, rfm)
+    rfm = timed(results, 'rfm.compute_all_time_filtered', compute_rfm, filtered, window=None)
+    timed(results, 'rfm.top_customers_all_time', rfm_top_customers, rfm)
+
+    # Product popularity and correlation analysis
+    timed(results, 'products.top_10', product_popularity, datasets['avg_popularity_products'])
+    timed(results, 'correlation.stats', delivery_satisfaction, datasets['order_reviews'])
+    return {'rows': len(orders_items_payments), 'stages': results}
+
+
+def compare(report, baseline, tolerance, noise_floor=NOISE_FLOOR_SECONDS):
+    """
+    Stages slower than the baseline by more than `tolerance` (a ratio).
+    Stages faster than `noise_floor` seconds in the baseline are ignored.
+    """
+    regressions = []
+    for scale, current in report['scales'].items():
+        previous = baseline.get('scales', {}).get(scale)
+        if previous is None:
+            continue
+        for stage, result in current['stages'].items():
+            before = previous['stages'].get(stage)
+            if before is None or before['seconds'] < noise_floor:
+                continue
+            ratio = result['seconds'] / before['seconds']
+            if ratio > tolerance:
+                regressions.append((scale, stage, before['seconds'], result['seconds'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard computations on synthetic data.")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="numbers of order rows to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per stage; the fastest is kept")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_report.json"), help="where to write the JSON report")
+    parser.add_argument("--baseline", type=Path, help="previous report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed slowdown ratio against the baseline")
+    parser.add_argument("--noise-floor", type=float, default=NOISE_FLOOR_SECONDS, help="baseline seconds below which stages are not compared")
+    args = parser.parse_args(argv)
+
+    report = {
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'scales': {},
+    }
+    for n_rows in args.scales:
+        print(f"Benchmarking {n_rows:,} rows...")
+        result = run_scale(n_rows, seed=args.seed, repeat=args.repeat)
+        report['scales'][str(n_rows)] = result
+        for stage, stats in result['stages'].items():
+            peak = "" if stats['peak_mb'] is None else f"{stats['peak_mb']:>10.1f} MB"
+            print(f"  {stage:<32} {stats['seconds']:>10.4f} s {peak}")
+
+    status = 0
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance, args.noise_floor)
+        report['regressions'] = [
+            {'scale': scale, 'stage': stage, 'baseline_seconds': before, 'seconds': after, 'ratio': round(ratio, 3)}
+            for scale, stage, before, after, ratio in regressions
+        ]
+        for scale, stage, before, after, ratio in regressions:
+            print(f"REGRESSION {scale} rows, {stage}: {before:.4f} s -> {after:.4f} s ({ratio:.2f}x)")
+        status = 1 if regressions else 0
+
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {args.output}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache shared by every session of the
+    Streamlit process. With `max_bytes`, entries are also evicted once the
+    total of `sizeof(value)` exceeds the budget.
+    """
+
+    def __init__(self, maxsize=32, max_bytes=None, sizeof=len):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def _size(self, value):
+        return self.sizeof(value) if self.max_bytes is not None else 0
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._size(self._data.pop(key))
+            self._data[key] = value
+            self.nbytes += self._size(value)
+            # Evict least recently used entries, always keeping the newest one
+            while len(self._data) > 1 and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self.nbytes -= self._size(evicted)
+
+    def get_or_create(self, key, build):
+        """
+        Return the cached value for a key, building and storing it on a miss.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+_MISSING = object()
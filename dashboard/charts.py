@@ -0,0 +1,50 @@
+import hashlib
+import io
+import os
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+import profiling
+from cache import LRUCache
+
+# Rendered PNGs keyed by (chart id, data key, filter state), bounded by count and total size
+CHART_CACHE_MAX_BYTES = int(os.environ.get("CHART_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+_chart_cache = LRUCache(maxsize=256, max_bytes=CHART_CACHE_MAX_BYTES)
+
+
+def frame_hash(df):
+    """
+    Content hash of a small frame or series, for charts whose input has no
+    cheaper version key.
+    """
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    if isinstance(df, pd.DataFrame):
+        digest.update(repr(list(df.columns)).encode())
+    return digest.hexdigest()
+
+
+def _render(draw, figsize, dpi):
+    """
+    Draw on a standalone Figure and return it as PNG bytes. The figure is not
+    registered with pyplot, so nothing is left behind once it is rendered.
+    """
+    fig = Figure(figsize=figsize, dpi=dpi)
+    try:
+        draw(fig)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def render_chart(chart_id, data_key, filter_state, draw, figsize=(6.4, 4.8), dpi=100):
+    """
+    Return the PNG for a chart, rendering it only when this combination of
+    chart, data and filter state has not been rendered before. `draw`
+    receives an empty Figure to draw on.
+    """
+    key = (chart_id, data_key, filter_state, figsize, dpi)
+    with profiling.stage(f"chart:{chart_id}"):
+        return _chart_cache.get_or_create(key, lambda: _render(draw, figsize, dpi))
@@ -0,0 +1,39 @@
+from rfm import top_customers
+
+
+def sales_summary(rollup, selected_years, selected_months):
+    """
+    Monthly sales, orders, customers and average spending per customer for
+    the selected months, plus the sidebar totals.
+    """
+    # Select the months of the precomputed rollup matching the unified filter
+    month_mask = (
+        rollup.months.year.isin(selected_years) & rollup.months.month_name().isin(selected_months)
+    )
+    monthly = rollup.monthly(month_mask)
+    totals = {
+        'sales': monthly['payment_value'].sum(),
+        'orders': monthly['order_id'].sum(),
+        'customers': rollup.unique_customers(month_mask),
+    }
+    return monthly, totals
+
+
+def rfm_top_customers(rfm, k=5):
+    """
+    Top customers by recency (most recent first), frequency and monetary value.
+    """
+    return {
+        'recency': top_customers(rfm, 'recency', k=k, ascending=True),
+        'frequency': top_customers(rfm, 'frequency', k=k),
+        'monetary': top_customers(rfm, 'monetary', k=k),
+    }
+
+
+def product_popularity(avg_popularity_products, k=10):
+    """
+    Categories with the highest average price and the most products sold.
+    """
+    top_price = avg_popularity_products.nlargest(k, 'price')
+    top_sold = avg_popularity_products.nlargest(k, 'product_id')
+    return top_price, top_sold
@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+
+# Statistics per (dataset version, filter selection)
+_stats_cache = LRUCache(maxsize=32)
+
+
+class DeliveryTable:
+    """
+    Counts of orders per (delivery day, review score) cell. Delivery times
+    are whole days, so the table is lossless and every statistic below costs
+    the same no matter how many orders it summarizes.
+    """
+
+    def __init__(self, delivery_time, review_score):
+        x = np.asarray(delivery_time, dtype=np.float64)
+        y = np.asarray(review_score, dtype=np.float64)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = np.floor(x[valid]).astype(np.int64), np.rint(y[valid]).astype(np.int64)
+
+        # Contiguous ranges, so cells line up with fixed-width bins when plotted
+        self.days = np.arange(x.min(), x.max() + 1) if len(x) else np.empty(0, dtype=np.int64)
+        self.scores = np.arange(y.min(), y.max() + 1) if len(y) else np.empty(0, dtype=np.int64)
+        day_idx = x - x.min() if len(x) else x
+        score_idx = y - y.min() if len(y) else y
+        cells = np.bincount(
+            day_idx * len(self.scores) + score_idx,
+            minlength=len(self.days) * len(self.scores),
+        )
+        self.counts = cells.reshape(len(self.days), len(self.scores))
+        self.n = int(self.counts.sum())
+
+    def mean_score_per_day(self):
+        """
+        Number of orders and mean review score for every delivery day.
+        """
+        orders = self.counts.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (self.counts @ self.scores) / orders
+        return pd.DataFrame({'orders': orders, 'review_score': mean}, index=pd.Index(self.days, name='delivery_time'))
+
+
+def _weighted_pearson(x, y, w):
+    """
+    Pearson correlation of cell values x, y weighted by counts w. All inputs
+    broadcast to (batch, cells); returns one value per batch row.
+    """
+    n = w.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = (w * x).sum(axis=-1) / n
+        my = (w * y).sum(axis=-1) / n
+        cov = (w * x * y).sum(axis=-1) / n - mx * my
+        vx = (w * x * x).sum(axis=-1) / n - mx * mx
+        vy = (w * y * y).sum(axis=-1) / n - my * my
+        return cov / np.sqrt(vx * vy)
+
+
+def _midranks(marginal):
+    """
+    Average rank of each distinct value given its counts, per batch row.
+    """
+    before = np.cumsum(marginal, axis=-1) - marginal
+    return before + (marginal + 1) / 2
+
+
+def _pearson_batch(table, counts):
+    x, y = np.meshgrid(table.days.astype(np.float64), table.scores.astype(np.float64), indexing='ij')
+    return _weighted_pearson(x.ravel(), y.ravel(), counts.reshape(len(counts), -1))
+
+
+def _spearman_batch(table, counts):
+    # Spearman with ties is the Pearson correlation of the average ranks
+    rank_x = _midranks(counts.sum(axis=2))[:, :, None]
+    rank_y = _midranks(counts.sum(axis=1))[:, None, :]
+    shape = counts.shape
+    return _weighted_pearson(
+        np.broadcast_to(rank_x, shape).reshape(shape[0], -1),
+        np.broadcast_to(rank_y, shape).reshape(shape[0], -1),
+        counts.reshape(shape[0], -1),
+    )
+
+
+def correlation_stats(table, n_boot=1000, batch_size=200, confidence=0.95, seed=0):
+    """
+    Pearson and Spearman correlation with percentile bootstrap confidence
+    intervals. Resampling orders with replacement is done as multinomial
+    draws over the table cells, in batches of `batch_size` resamples.
+    """
+    counts = table.counts[None].astype(np.float64)
+    stats = {
+        'n': table.n,
+        'pearson': float(_pearson_batch(table, counts)[0]),
+        'spearman': float(_spearman_batch(table, counts)[0]),
+    }
+    if table.n < 2:
+        stats.update(pearson_ci=(np.nan, np.nan), spearman_ci=(np.nan, np.nan))
+        return stats
+
+    rng = np.random.default_rng(seed)
+    probabilities = table.counts.ravel() / table.n
+    pearson, spearman = [], []
+    for start in range(0, n_boot, batch_size):
+        size = min(batch_size, n_boot - start)
+        resampled = rng.multinomial(table.n, probabilities, size=size).astype(np.float64)
+        resampled = resampled.reshape(size, *table.counts.shape)
+        pearson.append(_pearson_batch(table, resampled))
+        spearman.append(_spearman_batch(table, resampled))
+
+    tail = (1 - confidence) / 2 * 100
+    stats['pearson_ci'] = tuple(np.nanpercentile(np.concatenate(pearson), [tail, 100 - tail]))
+    stats['spearman_ci'] = tuple(np.nanpercentile(np.concatenate(spearman), [tail, 100 - tail]))
+    return stats
+
+
+def delivery_satisfaction(df):
+    """
+    Delivery table and correlation statistics for a frame of reviewed orders.
+    """
+    table = DeliveryTable(df['delivery_time'].to_numpy(), df['review_score'].to_numpy())
+    return table, correlation_stats(table)
+
+
+def cached_delivery_satisfaction(key, df):
+    """
+    `delivery_satisfaction` shared across sessions. `key` must identify both
+    the dataset version and the filter selection.
+    """
+    return _stats_cache.get_or_create(key, lambda: delivery_satisfaction(df))
+
+
+def store_delivery_satisfaction(key, result):
+    """
+    Add a `delivery_satisfaction` result computed elsewhere, e.g. by a
+    warm-up worker, under the key `cached_delivery_satisfaction` would use.
+    """
+    _stats_cache.put(key, result)
+
+
+def describe_correlation(r):
+    """
+    Indonesian description of the direction and strength of a correlation.
+    """
+    if np.isnan(r):
+        return "tidak dapat dihitung"
+    strength = abs(r)
+    if strength < 0.1:
+        label = "sangat lemah"
+    elif strength < 0.4:
+        label = "lemah"
+    elif strength < 0.7:
+        label = "sedang"
+    else:
+        label = "kuat"
+    direction = "negatif" if r < 0 else "positif"
+    return f"{direction} yang {label}"
+
+
+def describe_direction(r):
+    """
+    Indonesian sentence on what the sign of a delivery time vs review score
+    correlation means, and the change in satisfaction it points to.
+    """
+    if r < 0:
+        return "Nilai korelasi negatif menunjukkan bahwa ada kecenderungan bahwa semakin lama waktu pengiriman pesanan, tingkat kepuasan pelanggan cenderung menurun.", "penurunan"
+    if r > 0:
+        return "Nilai korelasi positif menunjukkan bahwa ada kecenderungan bahwa semakin lama waktu pengiriman pesanan, tingkat kepuasan pelanggan justru cenderung meningkat.", "peningkatan"
+    return "Nilai korelasi nol menunjukkan bahwa tidak ada kecenderungan searah antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan.", "perubahan"
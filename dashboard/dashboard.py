@@ -1,7 +1,19 @@
+import uuid
+
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
+from matplotlib.colors import LogNorm
+
+import profiling
+import warmup
+from charts import frame_hash, render_chart
+from compute import product_popularity, rfm_top_customers, sales_summary
+from correlation import cached_delivery_satisfaction, describe_correlation, describe_direction
+from data_loader import dataset_version, load_dataset, load_derived
+from filters import build_filter_index, selection_key
+from rfm import WINDOWS, cached_rfm
+from rollup import build_monthly_rollup
 
 # Title and Introduction
 st.title("E-Commerce Data Analysis Dashboard")
@@ -29,92 +41,87 @@ st.markdown("""
             While a weak negative correlation exists between delivery time and customer satisfaction, it's not a primary driver of customer sentiment. RFM analysis identified valuable customer segments based on recency, frequency, and monetary value, providing opportunities for targeted marketing efforts.
             """)
 
-# Load datasets
-orders_items_payments_path = "https://raw.githubusercontent.com/ralik45/E-Commerce-Analysis/refs/heads/main/dashboard/orders_items_payments.csv"
-orders_path = "https://raw.githubusercontent.com/ralik45/E-Commerce-Analysis/refs/heads/main/dashboard/rfm_df.csv"
-avg_popularity_products_path = "https://raw.githubusercontent.com/ralik45/E-Commerce-Analysis/refs/heads/main/dashboard/avg_popularity_product.csv"
-order_reviews_path = "https://raw.githubusercontent.com/ralik45/E-Commerce-Analysis/refs/heads/main/dashboard/order_delivery_satisfaction_df.csv"
+# Opt-in profiling of this rerun (DASHBOARD_PROFILE=1, or ?profile=1 where DASHBOARD_PROFILE_QUERY=1)
+profiler = profiling.activate(profiling.Profiler(
+    profiling.profiling_requested(st.query_params),
+    session_id=st.session_state.setdefault("profile_session_id", uuid.uuid4().hex),
+))
 
 try:
-    orders_items_payments = pd.read_csv(orders_items_payments_path)
-    orders_df = pd.read_csv(orders_path)
-    avg_popularity_products = pd.read_csv(avg_popularity_products_path)
-    order_reviews_df = pd.read_csv(order_reviews_path)
-
-    def unified_filter(dataframes):
+    # Load datasets (local files first, typed columnar copies cached per process)
+    with profiling.stage("load"):
+        # The first rerun of the process loads and precomputes everything in parallel
+        warmup.ensure_warm()
+        orders_items_payments_index = load_derived("orders_items_payments", "filter_index", build_filter_index)
+        avg_popularity_products = load_dataset("avg_popularity_products")
+        order_reviews_index = load_derived("order_reviews", "filter_index", build_filter_index)
+        monthly_rollup = load_derived("orders_items_payments", "monthly_rollup", build_monthly_rollup)
+
+    def unified_filter(filter_indexes):
         """
         Create a unified filter for year and month, applied to multiple dataframes.
         """
-        # Ensure datetime format
-        for df in dataframes:
-            df['order_month'] = pd.to_datetime(df['order_month'])
-            df['year'] = df['order_month'].dt.year
-            df['month'] = df['order_month'].dt.month_name()
-
         # Sidebar filters
         st.sidebar.header("Apply Filters")
-        available_years = sorted(dataframes[0]['year'].unique())
+        available_years = filter_indexes[0].available_years
         selected_years = st.sidebar.multiselect(
             "Select Years",
             options=available_years,
             default=available_years,
         )
-        available_months = sorted(dataframes[0]['month'].unique(), key=lambda x: pd.to_datetime(x, format='%B').month)
+        available_months = filter_indexes[0].available_months
         selected_months = st.sidebar.multiselect(
             "Select Months",
             options=available_months,
             default=available_months,
         )
 
-        # Apply filters
+        # Apply filters by slicing the period-sorted frames
         filtered_dataframes = [
-            df[(df['year'].isin(selected_years)) & (df['month'].isin(selected_months))]
-            for df in dataframes
+            index.select(selected_years, selected_months)
+            for index in filter_indexes
         ]
-        return filtered_dataframes
+        return filtered_dataframes, selected_years, selected_months
 
-    def sales_dashboard(filtered_df):
+    def sales_dashboard(rollup, selected_years, selected_months):
         """
         Sales Dashboard: Displays sales trends, orders, and customer behavior.
         """
         st.title("Sales Dashboard")
 
+        monthly, totals = sales_summary(rollup, selected_years, selected_months)
+
         # 1. Monthly Sales Analysis
         st.subheader("Monthly Sales Analysis")
-        monthly_sales = filtered_df.groupby('order_month')['payment_value'].sum()
+        monthly_sales = monthly['payment_value']
         st.line_chart(monthly_sales)
         st.markdown("Chart ini menunjukkan data penjualan dari Oktober 2016 hingga Agustus 2018, yang mencerminkan tren kenaikan signifikan secara keseluruhan. Titik terendah terjadi pada Desember 2016 dengan nilai 19.62, sementara puncaknya tercapai pada November 2017 dengan nilai 1,548,547.86. Setelah kenaikan tajam dari awal 2017 hingga akhir 2017, tren mengalami sedikit fluktuasi namun tetap berada pada kisaran tinggi hingga pertengahan 2018. Secara keseluruhan, data ini memperlihatkan pola pertumbuhan positif dengan kenaikan drastis pada tahun 2017 dan stabilisasi pada tingkat yang lebih tinggi selama 2018.")
 
         # 2. Monthly Orders Analysis
         st.subheader("Monthly Orders Analysis")
-        monthly_orders = filtered_df.groupby('order_month')['order_id'].count()
+        monthly_orders = monthly['order_id']
         st.line_chart(monthly_orders)
         st.markdown("Chart ini memperlihatkan jumlah pesanan bulanan dari Oktober 2016 hingga Agustus 2018, menunjukkan pertumbuhan signifikan secara keseluruhan. Titik terendah terjadi pada Desember 2016 dengan 1 pesanan, sementara puncaknya tercapai pada November 2017 dengan 8.812 pesanan. Dari awal 2017, jumlah pesanan meningkat secara konsisten hingga mencapai puncak di akhir tahun, kemudian stabil di kisaran tinggi sepanjang 2018 meskipun sedikit menurun dari puncaknya. Secara keseluruhan, tren pesanan menunjukkan peningkatan yang kuat pada tahun 2017, diikuti oleh stabilisasi pada tingkat yang relatif tinggi di tahun 2018.")
 
         # 3. Monthly Customers Analysis
         st.subheader("Monthly Customers Analysis")
-        monthly_customers = filtered_df.groupby('order_month')['customer_id'].nunique()
+        monthly_customers = monthly['customer_id']
         st.line_chart(monthly_customers)
         st.markdown("Chart ini memperlihatkan jumlah pelanggan bulanan dari Oktober 2016 hingga Agustus 2018, menunjukkan tren pertumbuhan yang signifikan secara keseluruhan. Jumlah pelanggan terendah tercatat pada Desember 2016 dengan 1 pelanggan, sementara puncaknya terjadi pada November 2017 dengan 7.288 pelanggan. Dari awal 2017, jumlah pelanggan meningkat tajam hingga akhir tahun 2017, diikuti oleh stabilisasi pada tingkat tinggi sepanjang tahun 2018 dengan sedikit penurunan setelah puncaknya. Secara keseluruhan, data ini menunjukkan pertumbuhan pesat selama 2017, yang kemudian berlanjut dengan konsistensi pada tingkat yang tinggi sepanjang 2018.")
         
         # 4. Dashboard Insights
         st.sidebar.header("Dashboard Insights")
-        st.sidebar.metric("Total Sales", f"${monthly_sales.sum():,.2f}")
-        st.sidebar.metric("Total Orders", monthly_orders.sum())
-        st.sidebar.metric("Total Unique Customers", monthly_customers.sum())
+        st.sidebar.metric("Total Sales", f"${totals['sales']:,.2f}")
+        st.sidebar.metric("Total Orders", totals['orders'])
+        st.sidebar.metric("Total Unique Customers", totals['customers'])
         
         # 5. Average Sales per Customer
         st.subheader("Average Spending per Customer")
-        sales_per_customer = (
-            filtered_df.groupby(['order_month', 'customer_id'])['payment_value'].sum().reset_index()
-        )
-        sales_per_customer_per_month = sales_per_customer.groupby('order_month').agg(
-            avg_sales_per_customer=('payment_value', 'mean')
-        )
+        sales_per_customer_per_month = monthly[['avg_sales_per_customer']]
         st.line_chart(sales_per_customer_per_month)
         st.markdown("Chart ini menunjukkan rata-rata penjualan per pelanggan per bulan dari Oktober 2016 hingga Agustus 2018. Rata-rata penjualan tertinggi tercatat pada Oktober 2016 sebesar 233.01, sementara titik terendahnya terjadi pada Desember 2016 dengan 19.62. Setelah fluktuasi awal, rata-rata penjualan per pelanggan stabil pada kisaran 180-240 di tahun-tahun berikutnya, dengan sedikit peningkatan di beberapa bulan seperti September 2017 (240.08) dan Mei 2018 (219.39). Secara keseluruhan, tren menunjukkan penurunan tajam setelah Oktober 2016, diikuti dengan stabilisasi pada tingkat menengah hingga akhir periode.")
 
-    def rfm_dashboard(filtered_rfm):
+    def rfm_dashboard(filtered_rfm, filter_key):
         """
         RFM Dashboard: Displays customer segmentation based on Recency, Frequency, and Monetary metrics.
         """
@@ -122,42 +129,36 @@ try:
 
         # Filtered RFM Data based on unified filter
         st.subheader("RFM Analysis")
-
-        # Ensure the 'order_purchase_timestamp' column is in datetime format
-        filtered_rfm['order_purchase_timestamp'] = pd.to_datetime(
-            filtered_rfm['order_purchase_timestamp']
-        )
-
-        # Filter data for the last month
-        one_month_ago = filtered_rfm['order_purchase_timestamp'].max() - pd.DateOffset(months=1)
-        rfm_df_filtered = filtered_rfm[filtered_rfm['order_purchase_timestamp'] >= one_month_ago]
-
-        # Calculate Frequency, Monetary, and Recency
-        rfm = rfm_df_filtered.groupby('customer_id').agg(
-            frequency=('order_id', 'count'),  # Count of orders
-            monetary=('payment_value', 'sum'),  # Sum of payment values
-            recency=('order_purchase_timestamp', 'max')  # Maximum order date
-        )
-
-        # Convert recency to days
-        rfm['recency'] = (
-            rfm_df_filtered['order_purchase_timestamp'].max() - rfm['recency']
-        ).dt.days
-
-        # Sort data for plotting
-        rfm_frequency = rfm.sort_values(by='frequency', ascending=False).head(5)
-        rfm_monetary = rfm.sort_values(by='monetary', ascending=False).head(5)
-        rfm_recency = rfm.sort_values(by='recency', ascending=True).head(5)
+        window_label = st.selectbox("RFM Window", options=list(WINDOWS), index=0)
+
+        # Score every customer once per (dataset version, window, filter) and reuse it across reruns
+        cache_key = (dataset_version("orders_items_payments"), window_label, filter_key)
+        rfm = cached_rfm(cache_key, filtered_rfm, window=WINDOWS[window_label])
+
+        # Customer segments
+        st.markdown("### Customer Segments")
+        st.bar_chart(rfm['segment'].value_counts(sort=False))
+
+        # Top customers for plotting
+        top = rfm_top_customers(rfm, k=5)
+        rfm_recency, rfm_frequency, rfm_monetary = top['recency'], top['frequency'], top['monetary']
+
+        def rfm_bar_chart(data, column, palette, ylabel, title):
+            def draw(fig):
+                ax = fig.subplots()
+                sns.barplot(x=data.index, y=data[column], palette=palette, ax=ax)
+                ax.set_xlabel("Customer ID")
+                ax.set_ylabel(ylabel)
+                ax.set_title(title)
+                ax.tick_params(axis='x', rotation=90)
+            return draw
 
         # Create bar charts
         st.markdown("### Customers by Recency")
-        fig, ax = plt.subplots()
-        sns.barplot(x=rfm_recency.index, y=rfm_recency['recency'], palette="Reds_d", ax=ax)
-        ax.set_xlabel("Customer ID")
-        ax.set_ylabel("Recency (Days)")
-        ax.set_title("Top 5 Customers by Recency (Most Recent First)")
-        ax.tick_params(axis='x', rotation=90)
-        st.pyplot(fig)
+        st.image(render_chart(
+            "rfm_recency", frame_hash(rfm_recency), filter_key,
+            rfm_bar_chart(rfm_recency, 'recency', "Reds_d", "Recency (Days)", "Top 5 Customers by Recency (Most Recent First)"),
+        ))
         st.markdown("""
                     Recency mengukur seberapa baru pelanggan terakhir kali melakukan transaksi. Dalam grafik "By Recency", data kosong menunjukkan bahwa pelanggan yang tercantum telah melakukan **transaksi pada hari yang sama** dengan waktu analisis ini. Dengan kata lain, mereka adalah pelanggan yang **paling aktif** dan baru saja berinteraksi dengan bisnis Anda.
 
@@ -173,13 +174,10 @@ try:
                     """)
         
         st.markdown("### Customers by Frequency")
-        fig, ax = plt.subplots()
-        sns.barplot(x=rfm_frequency.index, y=rfm_frequency['frequency'], palette="Blues_d", ax=ax)
-        ax.set_xlabel("Customer ID")
-        ax.set_ylabel("Frequency")
-        ax.set_title("Top 5 Customers by Frequency")
-        ax.tick_params(axis='x', rotation=90)
-        st.pyplot(fig)
+        st.image(render_chart(
+            "rfm_frequency", frame_hash(rfm_frequency), filter_key,
+            rfm_bar_chart(rfm_frequency, 'frequency', "Blues_d", "Frequency", "Top 5 Customers by Frequency"),
+        ))
         st.markdown("""
                     Frequency mengukur seberapa sering pelanggan melakukan transaksi. Pada grafik "By Frequency," terlihat bahwa beberapa pelanggan memiliki frekuensi transaksi yang sangat tinggi, dengan puncaknya lebih dari 25 transaksi, sedangkan pelanggan lain memiliki frekuensi yang lebih rendah (antara 10 hingga 15 transaksi).
 
@@ -195,13 +193,10 @@ try:
                     """)
         
         st.markdown("### Customers by Monetary Value")
-        fig, ax = plt.subplots()
-        sns.barplot(x=rfm_monetary.index, y=rfm_monetary['monetary'], palette="Greens_d", ax=ax)
-        ax.set_xlabel("Customer ID")
-        ax.set_ylabel("Monetary Value")
-        ax.set_title("Top 5 Customers by Monetary Value")
-        ax.tick_params(axis='x', rotation=90)
-        st.pyplot(fig)
+        st.image(render_chart(
+            "rfm_monetary", frame_hash(rfm_monetary), filter_key,
+            rfm_bar_chart(rfm_monetary, 'monetary', "Greens_d", "Monetary Value", "Top 5 Customers by Monetary Value"),
+        ))
         st.markdown("""
                     Monetary menunjukkan seberapa besar pendapatan yang dihasilkan dari masing-masing pelanggan. Pada grafik "By Monetary," terlihat bahwa beberapa pelanggan menyumbang pendapatan yang sangat tinggi (mencapai lebih dari 30.000 unit mata uang), sementara pelanggan lainnya memberikan kontribusi yang lebih kecil.
 
@@ -224,63 +219,123 @@ try:
 
         # Average Product Price per Category (Top 10)
         st.subheader("Average Product Price per Category (Top 10)")
-        fig1, ax1 = plt.subplots(figsize=(12, 6))
-        sns.barplot(
-            x='price',
-            y='product_category_name_english',
-            data=avg_popularity_products.sort_values(by='price', ascending=False).head(10),
-            palette='viridis',
-            ax=ax1
-        )
-        ax1.set_xlabel("Average Price")
-        ax1.set_ylabel("Product Category")
-        ax1.set_title("Average Product Price per Category (Top 10)")
-        st.pyplot(fig1)
+        top_price, top_sold = product_popularity(avg_popularity_products, k=10)
+
+        def draw_top_price(fig):
+            ax1 = fig.subplots()
+            sns.barplot(
+                x='price',
+                y='product_category_name_english',
+                data=top_price,
+                palette='viridis',
+                ax=ax1
+            )
+            ax1.set_xlabel("Average Price")
+            ax1.set_ylabel("Product Category")
+            ax1.set_title("Average Product Price per Category (Top 10)")
+
+        st.image(render_chart("product_price_top10", frame_hash(top_price), None, draw_top_price, figsize=(12, 6)))
         st.markdown("""
                     Chart ini menggambarkan harga produk rata-rata di berbagai kategori menunjukkan variasi yang signifikan. "Komputer" muncul sebagai kategori dengan harga produk rata-rata tertinggi, melebihi 1100. Diikuti oleh "Peralatan Kecil, Oven Rumah Tangga, dan Kopi", "Peralatan Rumah Tangga 2", "Industri Pertanian dan Perdagangan", dan "Pendingin Udara" dengan harga rata-rata berkisar antara 700 dan 1000. Di sisi lain, kategori seperti "Bunga", "Keamanan dan Pengawasan", "Perlengkapan Pesta", "Tas Fashion", "Makanan Minuman", dan "Popok dan Kebersihan" memiliki harga produk rata-rata yang relatif lebih rendah, yaitu di bawah 200. Kisaran harga rata-rata yang luas ini menyoroti keberagaman dalam penawaran produk dan strategi penetapan harga di berbagai kategori dalam platform e-commerce.
                     """)
         
         # Product Category Popularity (Top 10)
         st.subheader("Product Category Popularity (Top 10)")
-        fig2, ax2 = plt.subplots(figsize=(12, 6))
-        sns.barplot(
-            x='product_id',
-            y='product_category_name_english',
-            data=avg_popularity_products.sort_values(by='product_id', ascending=False).head(10),
-            palette='viridis',
-            ax=ax2
-        )
-        ax2.set_xlabel("Number of Products Sold")
-        ax2.set_ylabel("Product Category")
-        ax2.set_title("Product Category Popularity (Top 10)")
-        st.pyplot(fig2)
+
+        def draw_top_sold(fig):
+            ax2 = fig.subplots()
+            sns.barplot(
+                x='product_id',
+                y='product_category_name_english',
+                data=top_sold,
+                palette='viridis',
+                ax=ax2
+            )
+            ax2.set_xlabel("Number of Products Sold")
+            ax2.set_ylabel("Product Category")
+            ax2.set_title("Product Category Popularity (Top 10)")
+
+        st.image(render_chart("product_product_id_top10", frame_hash(top_sold), None, draw_top_sold, figsize=(12, 6)))
         st.markdown("""
                     Chart ini menyajikan wawasan mengenai popularitas kategori produk berdasarkan jumlah produk yang terjual. "Bed Bath Table" memimpin popularitas dengan hampir 12.000 produk terjual, diikuti oleh "Health Beauty" dengan sekitar 10.000 produk dan "Sports Leisure" yang melampaui 9.000. "Furniture Decor", "Computers Accessories", "Housewares", dan "Watches and Accessories" juga termasuk kategori populer, masing-masing dengan lebih dari 6.000 produk terjual. Di sisi lain, kategori seperti "Arts and Craftmanship", "La Cuisine", "cds dvds musics", dan "Fashion Childrens Clothes" tampaknya kurang populer dengan angka penjualan yang jauh lebih rendah. Temuan ini menunjukkan preferensi pelanggan dan pola permintaan di berbagai kategori produk, yang memberikan informasi berharga untuk manajemen inventaris dan strategi pemasaran.
                     """)
 
-    def correlation_analysis():
+    def correlation_analysis(filtered_reviews, filter_key):
         """
         Analyze and display the correlation between delivery time and customer satisfaction.
         """
         st.title("Correlation Analysis")
 
-        if 'delivery_time' in order_reviews_df:
-            st.subheader("Delivery Time vs Customer Satisfaction")
-            plt.figure(figsize=(10, 6))
-            sns.scatterplot(data=order_reviews_df, x='delivery_time', y='review_score')
-            st.pyplot(plt)
-        st.markdown("Korelasi antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan sebesar -0.3336852815284544 menunjukkan adanya korelasi negatif yang lemah antara kedua variabel tersebut. Nilai korelasi negatif menunjukkan bahwa ada kecenderungan bahwa semakin lama waktu pengiriman pesanan, tingkat kepuasan pelanggan cenderung menurun. Namun, penting untuk diingat bahwa korelasi sebesar -0.3336852815284544 itu cukup lemah, yang berarti hubungan antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan tidak terlalu kuat.")
-        st.markdown("Dalam konteks ini, sementara ada korelasi negatif yang lemah antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan, tidak dapat disimpulkan bahwa waktu pengiriman secara langsung menyebabkan penurunan tingkat kepuasan pelanggan. Hal ini hanya menunjukkan bahwa ada hubungan yang lemah antara kedua variabel tersebut.")
+        if 'delivery_time' not in filtered_reviews:
+            st.warning("Delivery time is not available in the review data.")
+            return
+
+        # Aggregate into a (delivery day x review score) table once per dataset version and filter
+        cache_key = (dataset_version("order_reviews"), filter_key)
+        table, stats = cached_delivery_satisfaction(cache_key, filtered_reviews)
+        if stats['n'] < 2 or np.isnan(stats['pearson']):
+            st.info("Not enough orders with varying delivery times and review scores in the selected period to compute a correlation.")
+            return
+        mean_score = table.mean_score_per_day()
+
+        st.subheader("Delivery Time vs Customer Satisfaction")
+
+        def draw_heatmap(fig):
+            ax = fig.subplots()
+            counts = np.ma.masked_equal(table.counts.T, 0)
+            if counts.count():
+                mesh = ax.pcolormesh(
+                    np.append(table.days, table.days[-1] + 1) - 0.5,
+                    np.append(table.scores, table.scores[-1] + 1) - 0.5,
+                    counts,
+                    norm=LogNorm(),
+                    cmap='viridis',
+                )
+                fig.colorbar(mesh, ax=ax, label="Number of Orders")
+            ax.plot(mean_score.index, mean_score['review_score'], color='red', label="Mean Review Score")
+            ax.set_xlabel("Order Delivery Time (days)")
+            ax.set_ylabel("Review Score")
+            ax.legend(loc='lower left')
+
+        st.image(render_chart("delivery_vs_satisfaction", cache_key, None, draw_heatmap, figsize=(10, 6)))
+
+        col1, col2 = st.columns(2)
+        col1.metric("Pearson", f"{stats['pearson']:.4f}")
+        col1.caption("95% CI: {:.4f} to {:.4f}".format(*stats['pearson_ci']))
+        col2.metric("Spearman", f"{stats['spearman']:.4f}")
+        col2.caption("95% CI: {:.4f} to {:.4f}".format(*stats['spearman_ci']))
+
+        description = describe_correlation(stats['pearson'])
+        direction, change = describe_direction(stats['pearson'])
+        st.markdown(f"Korelasi antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan sebesar {stats['pearson']:.4f} (dari {stats['n']:,} pesanan) menunjukkan adanya korelasi {description} antara kedua variabel tersebut. {direction} Interval kepercayaan 95% hasil bootstrap berada di antara {stats['pearson_ci'][0]:.4f} dan {stats['pearson_ci'][1]:.4f}, sehingga besarnya hubungan antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan dapat dinilai dengan lebih pasti.")
+        st.markdown(f"Dalam konteks ini, sementara ada korelasi antara waktu pengiriman pesanan dan tingkat kepuasan pelanggan, tidak dapat disimpulkan bahwa waktu pengiriman secara langsung menyebabkan {change} tingkat kepuasan pelanggan. Hal ini hanya menunjukkan bahwa ada hubungan antara kedua variabel tersebut.")
 
 
     # Apply the unified filter
-    filtered_orders_items_payments, filtered_orders_df = unified_filter([orders_items_payments, orders_df])
+    with profiling.stage("filter"):
+        (
+            (filtered_orders_items_payments, filtered_reviews),
+            selected_years,
+            selected_months,
+        ) = unified_filter([orders_items_payments_index, order_reviews_index])
+        filter_key = selection_key(selected_years, selected_months)
 
     # Display dashboards
-    sales_dashboard(filtered_orders_items_payments)
-    product_popularity_analysis()
-    correlation_analysis()
-    rfm_dashboard(filtered_orders_items_payments)
+    with profiling.stage("section:sales"):
+        sales_dashboard(monthly_rollup, selected_years, selected_months)
+    with profiling.stage("section:product_popularity"):
+        product_popularity_analysis()
+    with profiling.stage("section:correlation"):
+        correlation_analysis(filtered_reviews, filter_key)
+    with profiling.stage("section:rfm"):
+        rfm_dashboard(filtered_orders_items_payments, filter_key)
+
+    profiler.finish()
+    profiling.show_panel(st.sidebar, profiler)
 
 except FileNotFoundError:
     st.error("One or more data files could not be found. Please check the file paths.")
+
+finally:
+    # Also closes reruns interrupted by a widget change
+    profiler.finish()
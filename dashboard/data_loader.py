@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+# Source CSVs used by the dashboard, keyed by dataset name
+DATASETS = {
+    "orders_items_payments": "orders_items_payments.csv",
+    "rfm": "rfm_df.csv",
+    "avg_popularity_products": "avg_popularity_product.csv",
+    "order_reviews": "order_delivery_satisfaction_df.csv",
+}
+
+REMOTE_BASE_URL = "https://raw.githubusercontent.com/ralik45/E-Commerce-Analysis/refs/heads/main/dashboard/"
+
+DASHBOARD_DIR = Path(__file__).resolve().parent
+DATA_DIRS = [DASHBOARD_DIR, DASHBOARD_DIR.parent / "data"]
+CACHE_DIR = Path(os.environ.get("ECOMMERCE_CACHE_DIR", DASHBOARD_DIR / ".cache"))
+# Bump whenever the conversion (dtypes, sort order, file layout) changes, to invalidate cached copies
+CACHE_FORMAT = 2
+
+# Process-wide cache shared by every Streamlit session: name -> (fingerprint, dataframe).
+# The frames are memory-mapped and read-only; sessions only hold selections and results.
+_memory_cache = {}
+# Values built from a dataset (rollups, indexes): (name, key) -> (fingerprint, value)
+_derived_cache = {}
+_lock = threading.Lock()
+# Held while a dataset is (re)loaded, so concurrent sessions load it only once
+_load_locks = {name: threading.Lock() for name in DATASETS}
+
+
+def resolve_source(name):
+    """
+    Resolve a dataset to a local file, looking in local directories first and
+    downloading the remote copy into the cache directory only as a last resort.
+    """
+    filename = DATASETS[name]
+    search_dirs = list(DATA_DIRS)
+    if os.environ.get("ECOMMERCE_DATA_DIR"):
+        search_dirs.insert(0, Path(os.environ["ECOMMERCE_DATA_DIR"]))
+
+    for directory in search_dirs:
+        path = directory / filename
+        if path.is_file():
+            return path
+
+    # Fall back to a previously downloaded copy, then to the network
+    downloaded = CACHE_DIR / "remote" / filename
+    if not downloaded.is_file():
+        downloaded.parent.mkdir(parents=True, exist_ok=True)
+        # Sessions and processes may download the same file at once: each writes its own part file
+        tmp_path = downloaded.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+        try:
+            urllib.request.urlretrieve(REMOTE_BASE_URL + filename, tmp_path)
+            tmp_path.replace(downloaded)
+        except (urllib.error.URLError, OSError) as exc:
+            tmp_path.unlink(missing_ok=True)
+            # Another download of the same file may have finished in the meantime
+            if not downloaded.is_file():
+                raise FileNotFoundError(f"{filename} not found locally and could not be downloaded: {exc}") from exc
+    return downloaded
+
+
+def file_hash(path):
+    """
+    Compute the SHA-256 of a file, reading it in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def optimize_dtypes(df):
+    """
+    Parse datetime columns and store string ID columns, and other strings
+    with few distinct values, as categoricals.
+    """
+    for column in df.columns:
+        if column == "order_month" or column.endswith(("_timestamp", "_date", "_at")):
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+        elif df[column].dtype == object and (
+            column.endswith("_id") or df[column].nunique() < len(df) // 2
+        ):
+            df[column] = df[column].astype("category")
+    return df
+
+
+def _write_arrow(df, path):
+    """
+    Write a frame as an uncompressed Arrow IPC file with one record batch,
+    so every column can later be mapped without copying. The file is
+    written aside and renamed into place: processes still mapping the
+    previous version keep reading it undisturbed.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    tmp_path.replace(path)
+
+
+def _map_arrow(path):
+    """
+    Memory-map an Arrow IPC file as a frame. Numeric and datetime columns
+    without missing values are read-only views of the file, so their pages
+    live in the OS page cache and are shared by every process mapping it.
+    """
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+
+def _write_meta(path, meta):
+    """
+    Write a sidecar aside and rename it into place, so processes sharing
+    the cache directory never read a half-written one.
+    """
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(meta))
+    tmp_path.replace(path)
+
+
+def _read_meta(path):
+    """
+    The sidecar's contents, or None when it is missing or unreadable.
+    """
+    try:
+        meta = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) else None
+
+
+def _convert_to_arrow(source, arrow_path, meta_path, stat):
+    """
+    Parse a CSV once and write it as a typed Arrow file plus a sidecar with
+    the source fingerprint used to validate it later.
+    """
+    # Hash before parsing, so the sidecar never pairs old content with a newer file's hash
+    sha256 = file_hash(source)
+    df = optimize_dtypes(pd.read_csv(source))
+    sort_column = next((c for c in ("order_month", "order_purchase_timestamp") if c in df), None)
+    if sort_column is not None:
+        # Store rows in period order so the filter index can slice without re-sorting
+        df = df.sort_values(sort_column, kind="stable", ignore_index=True)
+    arrow_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_arrow(df, arrow_path)
+    current = source.stat()
+    if (current.st_mtime_ns, current.st_size) != (stat.st_mtime_ns, stat.st_size):
+        # Replaced while it was being parsed: leave no sidecar, so the next load converts again
+        meta_path.unlink(missing_ok=True)
+        return
+    _write_meta(meta_path, {
+        "format": CACHE_FORMAT,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+    })
+
+
+def _load_columnar(name, source, stat):
+    """
+    Return the typed, memory-mapped frame for a source, reusing the Arrow
+    copy when the source file is unchanged by mtime or, failing that, by
+    content hash.
+    """
+    arrow_path = CACHE_DIR / f"{name}.arrow"
+    meta_path = CACHE_DIR / f"{name}.json"
+    # An unreadable sidecar, or one written by another conversion format, counts as a miss
+    meta = _read_meta(meta_path) if arrow_path.is_file() else None
+    if meta is not None and meta.get("format") == CACHE_FORMAT:
+        if meta.get("mtime_ns") == stat.st_mtime_ns and meta.get("size") == stat.st_size:
+            return _map_arrow(arrow_path)
+        if meta.get("size") == stat.st_size and meta.get("sha256") == file_hash(source):
+            # Touched but not modified: refresh the sidecar and keep the Arrow copy
+            meta.update(mtime_ns=stat.st_mtime_ns)
+            _write_meta(meta_path, meta)
+            return _map_arrow(arrow_path)
+    _convert_to_arrow(source, arrow_path, meta_path, stat)
+    # Serve the mapped file rather than the parsed frame, which is dropped here
+    return _map_arrow(arrow_path)
+
+
+def _load_shared(name):
+    """
+    Return (fingerprint, frame) from the process-wide cache, loading the
+    dataset when it is missing or its source has changed. Only a stat() call
+    is made when the source is unchanged since the last load. Different
+    datasets can be loaded by different threads at the same time.
+    """
+    source = resolve_source(name)
+    stat = source.stat()
+    fingerprint = (stat.st_mtime_ns, stat.st_size)
+
+    with _load_locks[name]:
+        cached = _memory_cache.get(name)
+        if cached is None or cached[0] != fingerprint:
+            cached = (fingerprint, _load_columnar(name, source, stat))
+            with _lock:
+                _memory_cache[name] = cached
+                # Drop values derived from the previous version of this dataset
+                for key in [key for key in _derived_cache if key[0] == name]:
+                    del _derived_cache[key]
+    return cached
+
+
+def load_dataset(name):
+    """
+    Load a dataset through the process-wide cache. Its mapped columns are
+    read-only: writing into them raises ValueError.
+    """
+    _, df = _load_shared(name)
+    # Shallow copy so callers adding columns do not touch the shared frame object
+    return df.copy(deep=False)
+
+
+def dataset_version(name):
+    """
+    Fingerprint of the currently loaded version of a dataset, for use in cache keys.
+    """
+    fingerprint, _ = _load_shared(name)
+    return fingerprint
+
+
+def load_derived(name, key, build):
+    """
+    Build a value from a dataset once per source version and share it across
+    sessions. `build` receives the shared frame and must not modify it.
+    """
+    fingerprint, df = _load_shared(name)
+    with _lock:
+        cached = _derived_cache.get((name, key))
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    value = build(df)
+    with _lock:
+        _derived_cache[(name, key)] = (fingerprint, value)
+    return value
@@ -0,0 +1,254 @@
+"""
+Rebuild the derived tables read by the dashboard from the raw Olist tables.
+
+    python dashboard/etl.py [--data-dir data] [--out-dir dashboard] [--force]
+
+Raw tables are streamed in chunks and joined against in-memory lookups
+(category translation, products, sellers, orders, payments, customers). A
+manifest in the output directory records the content hash of every input
+used for each table, so a rerun only rebuilds tables whose inputs changed.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import DASHBOARD_DIR, file_hash
+
+RAW_TABLES = {
+    "customers": "customers_dataset.csv",
+    "order_items": "order_items_dataset.csv",
+    "order_payments": "order_payments_dataset.csv",
+    "order_reviews": "order_reviews_dataset.csv",
+    "orders": "orders_dataset.csv",
+    "product_category": "product_category_name_translation.csv",
+    "products": "products_dataset.csv",
+    "sellers": "sellers_dataset.csv",
+}
+
+ORDER_DATE_COLUMNS = [
+    "order_purchase_timestamp",
+    "order_approved_at",
+    "order_delivered_carrier_date",
+    "order_delivered_customer_date",
+    "order_estimated_delivery_date",
+]
+
+MANIFEST_NAME = ".etl_manifest.json"
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def category_lookup(data_dir, chunksize):
+    """
+    Hashed product_id -> English category lookup. Like the notebook, products
+    with missing attributes or an untranslated category are left out.
+    """
+    translation = pd.read_csv(data_dir / RAW_TABLES["product_category"], encoding="utf-8-sig")
+    translation = translation.set_index("product_category_name")["product_category_name_english"]
+
+    lookups = []
+    for chunk in pd.read_csv(data_dir / RAW_TABLES["products"], chunksize=chunksize):
+        chunk = chunk.dropna()
+        lookups.append(chunk.set_index("product_id")["product_category_name"].map(translation).dropna())
+    return pd.concat(lookups).rename("product_category_name_english")
+
+
+def seller_lookup(data_dir):
+    """
+    Hashed seller_id -> seller_state lookup.
+    """
+    sellers = pd.read_csv(data_dir / RAW_TABLES["sellers"], usecols=["seller_id", "seller_state"])
+    return sellers.set_index("seller_id")["seller_state"]
+
+
+def load_orders(data_dir):
+    """
+    Orders with parsed dates, keeping only orders that were delivered.
+    """
+    orders = pd.read_csv(data_dir / RAW_TABLES["orders"], parse_dates=ORDER_DATE_COLUMNS)
+    # Canceled or unavailable orders have no meaningful fulfilment dates
+    orders.loc[
+        orders["order_status"].isin(["canceled", "unavailable"]),
+        ["order_approved_at", "order_delivered_carrier_date", "order_delivered_customer_date"],
+    ] = pd.NaT
+    return orders.dropna(subset=["order_approved_at", "order_delivered_carrier_date", "order_delivered_customer_date"])
+
+
+def write_chunks(chunks, out_path):
+    """
+    Write frames to one CSV through a temporary file and return the row count.
+    """
+    tmp_path = out_path.with_suffix(".tmp")
+    rows = 0
+    with open(tmp_path, "w", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, index=False, header=(i == 0))
+            rows += len(chunk)
+    tmp_path.replace(out_path)
+    return rows
+
+
+def build_avg_popularity_product(data_dir, out_dir, chunksize):
+    """
+    Average price and number of items sold per category.
+    """
+    categories = category_lookup(data_dir, chunksize)
+    totals = []
+    for chunk in pd.read_csv(data_dir / RAW_TABLES["order_items"], usecols=["product_id", "price"], chunksize=chunksize):
+        chunk["product_category_name_english"] = chunk["product_id"].map(categories)
+        totals.append(chunk.groupby("product_category_name_english")["price"].agg(["sum", "count"]))
+
+    totals = pd.concat(totals).groupby(level=0).sum()
+    result = pd.DataFrame({
+        "price": totals["sum"] / totals["count"],
+        "product_id": totals["count"],
+    }).sort_values("price", ascending=False).reset_index()
+    return write_chunks([result], out_dir / "avg_popularity_product.csv")
+
+
+def build_orders_items_payments(data_dir, out_dir, chunksize):
+    """
+    Order items joined with payments and delivered orders, plus the order
+    month, English category and seller state of every row.
+    """
+    categories = category_lookup(data_dir, chunksize)
+    seller_states = seller_lookup(data_dir)
+    payments = pd.read_csv(data_dir / RAW_TABLES["order_payments"])
+    orders = load_orders(data_dir)
+
+    def chunks():
+        for chunk in pd.read_csv(data_dir / RAW_TABLES["order_items"], chunksize=chunksize):
+            chunk = chunk.merge(payments, on="order_id").merge(orders, on="order_id")
+            chunk["order_month"] = chunk["order_purchase_timestamp"].dt.to_period("M").astype(str)
+            chunk["product_category_name_english"] = chunk["product_id"].map(categories)
+            chunk["seller_state"] = chunk["seller_id"].map(seller_states)
+            yield chunk
+
+    return write_chunks(chunks(), out_dir / "orders_items_payments.csv")
+
+
+def build_rfm_df(data_dir, out_dir, chunksize):
+    """
+    orders_items_payments joined with customers.
+    """
+    customers = pd.read_csv(data_dir / RAW_TABLES["customers"])
+    chunks = (
+        chunk.merge(customers, on="customer_id")
+        for chunk in pd.read_csv(out_dir / "orders_items_payments.csv", chunksize=chunksize)
+    )
+    return write_chunks(chunks, out_dir / "rfm_df.csv")
+
+
+def build_order_delivery_satisfaction(data_dir, out_dir, chunksize):
+    """
+    Delivered orders joined with their reviews, with the delivery time in days.
+    """
+    orders = load_orders(data_dir)
+
+    def chunks():
+        for chunk in pd.read_csv(data_dir / RAW_TABLES["order_reviews"], chunksize=chunksize):
+            chunk[["review_comment_title", "review_comment_message"]] = (
+                chunk[["review_comment_title", "review_comment_message"]].fillna("Unknown")
+            )
+            chunk = orders.merge(chunk, on="order_id")
+            chunk["delivery_time"] = (
+                chunk["order_delivered_customer_date"] - chunk["order_purchase_timestamp"]
+            ).dt.days
+            yield chunk
+
+    return write_chunks(chunks(), out_dir / "order_delivery_satisfaction_df.csv")
+
+
+# Derived tables in build order: output -> (raw inputs, derived inputs, builder)
+TABLES = {
+    "avg_popularity_product.csv": (
+        ["order_items", "products", "product_category"], [], build_avg_popularity_product,
+    ),
+    "orders_items_payments.csv": (
+        ["order_items", "order_payments", "orders", "products", "product_category", "sellers"], [],
+        build_orders_items_payments,
+    ),
+    "rfm_df.csv": (["customers"], ["orders_items_payments.csv"], build_rfm_df),
+    "order_delivery_satisfaction_df.csv": (["orders", "order_reviews"], [], build_order_delivery_satisfaction),
+}
+
+
+def read_manifest(path):
+    """
+    The manifest of the last run, or an empty one when it is missing or
+    unreadable, e.g. after an interrupted write, so everything is rebuilt.
+    """
+    try:
+        manifest = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(path, manifest):
+    """
+    Write the manifest through a temporary file, so an interrupted run never
+    leaves a truncated one behind.
+    """
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    tmp_path.replace(path)
+
+
+def run(data_dir, out_dir, chunksize=DEFAULT_CHUNKSIZE, force=False, tables=None):
+    """
+    Rebuild the derived tables whose inputs changed since the last run and
+    return a {table: status} summary.
+    """
+    manifest_path = out_dir / MANIFEST_NAME
+    manifest = read_manifest(manifest_path)
+    hashes = {}
+
+    def input_hash(path):
+        if path not in hashes:
+            hashes[path] = file_hash(path)
+        return hashes[path]
+
+    summary = {}
+    for output, (raw_inputs, derived_inputs, build) in TABLES.items():
+        if tables and output not in tables:
+            continue
+        paths = [data_dir / RAW_TABLES[name] for name in raw_inputs] + [out_dir / name for name in derived_inputs]
+        missing = [path.name for path in paths if not path.is_file()]
+        if missing:
+            summary[output] = "skipped (missing " + ", ".join(missing) + ")"
+            continue
+
+        fingerprint = {path.name: input_hash(path) for path in paths}
+        if not force and manifest.get(output) == fingerprint and (out_dir / output).is_file():
+            summary[output] = "up to date"
+            continue
+
+        rows = build(data_dir, out_dir, chunksize)
+        hashes.pop(out_dir / output, None)
+        manifest[output] = fingerprint
+        write_manifest(manifest_path, manifest)
+        summary[output] = f"rebuilt ({rows:,} rows)"
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the dashboard's derived tables from the raw data.")
+    parser.add_argument("--data-dir", type=Path, default=DASHBOARD_DIR.parent / "data", help="directory with the raw Olist CSVs")
+    parser.add_argument("--out-dir", type=Path, default=DASHBOARD_DIR, help="directory the derived CSVs are written to")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk when streaming raw tables")
+    parser.add_argument("--force", action="store_true", help="rebuild every table even if its inputs are unchanged")
+    parser.add_argument("--table", action="append", choices=list(TABLES), dest="tables", help="only build this table (repeatable)")
+    args = parser.parse_args(argv)
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    summary = run(args.data_dir, args.out_dir, args.chunksize, args.force, args.tables)
+    for output, status in summary.items():
+        print(f"{output}: {status}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
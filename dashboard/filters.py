@@ -0,0 +1,102 @@
+import calendar
+
+import numpy as np
+import pandas as pd
+
+
+def _period_codes(df, column):
+    """
+    Integer period (year * 12 + month - 1) for every row; -1 for missing dates.
+    """
+    dates = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors='coerce')
+    codes = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.float64)
+    return np.where(np.isnan(codes), -1, codes).astype(np.int32)
+
+
+def selection_key(selected_years, selected_months):
+    """
+    Cache key for a year and month-name selection that does not depend on
+    the order the options were picked in.
+    """
+    month_order = list(calendar.month_name)
+    return (
+        tuple(sorted(set(selected_years))),
+        tuple(sorted(set(selected_months), key=month_order.index)),
+    )
+
+
+class FilterIndex:
+    """
+    Year/month index over a frame kept sorted by period, so any year x month
+    selection is answered by slicing the frame instead of comparing strings
+    on every row. The indexed frame is shared and never modified.
+    """
+
+    def __init__(self, df, column='order_month'):
+        periods = _period_codes(df, column)
+        if np.all(periods[:-1] <= periods[1:]):
+            self.frame = df
+        else:
+            order = np.argsort(periods, kind='stable')
+            self.frame = df.take(order)
+            periods = periods[order]
+
+        # Rows with a missing date are never selected
+        self._offset = int(np.searchsorted(periods, 0))
+        self.periods, starts, counts = np.unique(periods[self._offset:], return_index=True, return_counts=True)
+        self.starts = starts + self._offset
+        self.counts = counts
+        self.years = self.periods // 12
+        self.months = self.periods % 12 + 1
+
+    @property
+    def available_years(self):
+        return sorted(np.unique(self.years).tolist())
+
+    @property
+    def available_months(self):
+        """
+        Month names present in the data, in calendar order.
+        """
+        return [calendar.month_name[month] for month in np.unique(self.months)]
+
+    def period_mask(self, selected_years, selected_months):
+        """
+        Boolean mask over the indexed periods for a year and month-name selection.
+        """
+        month_numbers = [list(calendar.month_name).index(name) for name in selected_months]
+        return np.isin(self.years, selected_years) & np.isin(self.months, month_numbers)
+
+    def select(self, selected_years, selected_months):
+        """
+        Rows of the indexed frame matching the selection. Returns a shallow
+        copy of the frame when everything is selected and a slice when the
+        selected periods are contiguous; only scattered selections copy rows.
+        """
+        mask = self.period_mask(selected_years, selected_months)
+        if mask.all() and self._offset == 0:
+            # Shallow copy so callers adding columns do not touch the shared frame object
+            return self.frame.copy(deep=False)
+        if not mask.any():
+            return self.frame.iloc[0:0]
+
+        selected = np.flatnonzero(mask)
+        if selected[-1] - selected[0] + 1 == len(selected):
+            start = self.starts[selected[0]]
+            stop = self.starts[selected[-1]] + self.counts[selected[-1]]
+            return self.frame.iloc[start:stop]
+
+        row_mask = np.zeros(len(self.frame), dtype=bool)
+        row_mask[self._offset:] = np.repeat(mask, self.counts)
+        return self.frame[row_mask]
+
+
+def build_filter_index(df):
+    """
+    Build the year/month filter index for a frame, using `order_month` or,
+    for frames without it, `order_purchase_timestamp`.
+    """
+    column = 'order_month' if 'order_month' in df else 'order_purchase_timestamp'
+    return FilterIndex(df, column)
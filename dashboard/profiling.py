@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from data_loader import CACHE_DIR
+
+# Profiling is opt-in: DASHBOARD_PROFILE=1 for every session, or ?profile=1 for one
+# session where DASHBOARD_PROFILE_QUERY=1 lets visitors ask for it
+PROFILE_ENV = "DASHBOARD_PROFILE"
+PROFILE_QUERY_ENV = "DASHBOARD_PROFILE_QUERY"
+PROFILE_LOG = Path(os.environ.get("DASHBOARD_PROFILE_LOG", CACHE_DIR / "profile.jsonl"))
+TRACE_MEMORY = os.environ.get("DASHBOARD_PROFILE_MEMORY", "1") != "0"
+
+_local = threading.local()
+_log_lock = threading.Lock()
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+# Counts profiled reruns that started tracing, to detect overlapping ones
+_tracing_epoch = 0
+
+
+def profiling_requested(query_params):
+    """
+    Whether profiling is enabled by the environment or, where the
+    environment allows it, by the page's query string. Profiling traces
+    memory process-wide and appends to the log, so anonymous visitors
+    cannot turn it on by default.
+    """
+    if os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes"):
+        return True
+    if os.environ.get(PROFILE_QUERY_ENV, "").lower() not in ("1", "true", "yes"):
+        return False
+    return query_params.get("profile", "") in ("1", "true", "yes")
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_started, _tracing_epoch
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+        _tracing_epoch += 1
+
+
+def _exclusive_epoch():
+    """
+    The current epoch when this is the only profiled rerun tracing memory,
+    else None. The peak of a stage is only meaningful if no other profiled
+    rerun reset it in the meantime, i.e. if the epoch is unchanged and still
+    exclusive when the stage ends.
+    """
+    with _tracing_lock:
+        return _tracing_epoch if _tracing_users == 1 else None
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        # Only stop tracing we started, once no profiled rerun needs it
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+class Profiler:
+    """
+    Per-rerun recorder of wall time and peak traced memory for named,
+    possibly nested stages. Memory is traced process-wide, so peaks include
+    allocations of other sessions running at the same time. Peaks are only
+    recorded while no other profiled rerun is running, since each one
+    resets the process-wide peak; overlapping stages get a null `peak_mb`.
+    """
+
+    def __init__(self, enabled, session_id=None):
+        self.enabled = enabled
+        self.session_id = session_id
+        self.trace_memory = enabled and TRACE_MEMORY
+        self.records = []
+        self.entry = None
+        self._stack = []
+        self._started = time.perf_counter()
+        if self.trace_memory:
+            _start_tracing()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        epoch = _exclusive_epoch() if self.trace_memory else None
+        if epoch is not None:
+            # Fold the peak so far into the enclosing stage before resetting it for this one
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        elif self._stack:
+            self._stack[-1]['valid'] = False
+        record = {'stage': name, 'depth': len(self._stack), 'seconds': None, 'peak_mb': None}
+        self.records.append(record)
+        frame = {'record': record, 'peak': 0, 'valid': epoch is not None}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            self._stack.pop()
+            if frame['valid'] and _exclusive_epoch() == epoch:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = round(peak / 2**20, 3)
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            elif self._stack:
+                # A peak that overlapped another profiled rerun spoils the enclosing ones too
+                self._stack[-1]['valid'] = False
+
+    def finish(self):
+        """
+        Close the rerun and append its record to the profile log. Safe to
+        call more than once; only the first call writes.
+        """
+        if getattr(_local, 'profiler', None) is self:
+            _local.profiler = None
+        if not self.enabled or self.entry is not None:
+            return self.entry
+        if self.trace_memory:
+            _stop_tracing()
+            self.trace_memory = False
+
+        entry = {
+            'timestamp': pd.Timestamp.now().isoformat(timespec='milliseconds'),
+            'session_id': self.session_id,
+            'total_seconds': round(time.perf_counter() - self._started, 6),
+            'stages': self.records,
+        }
+        PROFILE_LOG.parent.mkdir(parents=True, exist_ok=True)
+        with _log_lock, open(PROFILE_LOG, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self.entry = entry
+        return entry
+
+    def breakdown(self):
+        """
+        Recorded stages as a frame, with nested stages indented.
+        """
+        return pd.DataFrame({
+            'stage': ["  " * r['depth'] + r['stage'] for r in self.records],
+            'seconds': [r['seconds'] for r in self.records],
+            'peak_mb': [r['peak_mb'] for r in self.records],
+        })
+
+
+_disabled = Profiler(False)
+
+
+def activate(profiler):
+    """
+    Make a profiler the current one for this thread, i.e. for the Streamlit
+    rerun running on it, until its `finish()` is called.
+    """
+    _local.profiler = profiler
+    return profiler
+
+
+def stage(name):
+    """
+    Time a stage with the current thread's profiler, if any.
+    """
+    return (getattr(_local, 'profiler', None) or _disabled).stage(name)
+
+
+def show_panel(container, profiler):
+    """
+    Render the per-stage breakdown of a finished rerun, e.g. in the sidebar.
+    """
+    if profiler.entry is None:
+        return
+    container.header("Profiling")
+    container.metric("Rerun Time", f"{profiler.entry['total_seconds']:.3f} s")
+    container.dataframe(profiler.breakdown(), hide_index=True)
+    container.caption(f"Records appended to {PROFILE_LOG}")
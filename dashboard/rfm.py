@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+
+# Look-back windows offered by the RFM dashboard; None means the full history
+WINDOWS = {
+    "1 Month": pd.DateOffset(months=1),
+    "3 Months": pd.DateOffset(months=3),
+    "6 Months": pd.DateOffset(months=6),
+    "12 Months": pd.DateOffset(months=12),
+    "All Time": None,
+}
+
+# Segment rules evaluated in order on the R/F/M scores; unmatched customers are "Hibernating"
+SEGMENTS = [
+    ("Champions", lambda r, f, m: (r >= 4) & (f >= 4)),
+    ("Loyal Customers", lambda r, f, m: (r >= 3) & (f >= 4)),
+    ("Can't Lose Them", lambda r, f, m: (r <= 2) & (f >= 4) & (m >= 4)),
+    ("At Risk", lambda r, f, m: (r <= 2) & (f >= 3)),
+    ("New Customers", lambda r, f, m: (r >= 4) & (f <= 1)),
+    ("Potential Loyalists", lambda r, f, m: r >= 3),
+]
+
+# Scored results per (dataset version, window, filter selection)
+_results_cache = LRUCache(maxsize=16)
+
+# Number of partial rows kept before chunked partial aggregates are merged
+_COMPACT_ROWS = 1_000_000
+
+
+def _window_start(as_of, window):
+    return None if window is None else as_of - window
+
+
+def _partial_aggregate(df, start):
+    """
+    Per-customer order count, payment sum and last purchase for one frame.
+    """
+    timestamps = df['order_purchase_timestamp']
+    if start is not None:
+        df = df[timestamps >= start]
+    return df.groupby('customer_id', observed=True).agg(
+        frequency=('order_id', 'count'),  # Count of orders
+        monetary=('payment_value', 'sum'),  # Sum of payment values
+        last_purchase=('order_purchase_timestamp', 'max')  # Maximum order date
+    )
+
+
+def _merge_partials(partials):
+    """
+    Combine partial per-customer aggregates into one.
+    """
+    combined = pd.concat(partials)
+    return combined.groupby(level=0, observed=True).agg(
+        frequency=('frequency', 'sum'),
+        monetary=('monetary', 'sum'),
+        last_purchase=('last_purchase', 'max'),
+    )
+
+
+def _finish(aggregated, as_of):
+    # Convert the last purchase to recency in days
+    aggregated['recency'] = (as_of - aggregated['last_purchase']).dt.days
+    return aggregated[['recency', 'frequency', 'monetary']]
+
+
+def aggregate_rfm(df, window=None, as_of=None):
+    """
+    Recency (days), frequency and monetary value per customer for the orders
+    inside the window ending at `as_of` (the latest purchase by default).
+    """
+    if as_of is None:
+        as_of = df['order_purchase_timestamp'].max()
+    aggregated = _partial_aggregate(df, _window_start(as_of, window))
+    return _finish(aggregated, as_of)
+
+
+def _read_chunk(chunk):
+    chunk = chunk[['customer_id', 'order_id', 'payment_value', 'order_purchase_timestamp']]
+    if not pd.api.types.is_datetime64_any_dtype(chunk['order_purchase_timestamp']):
+        chunk = chunk.assign(order_purchase_timestamp=pd.to_datetime(chunk['order_purchase_timestamp']))
+    return chunk
+
+
+def aggregate_rfm_chunks(chunk_source, window=None, as_of=None):
+    """
+    Same as `aggregate_rfm`, but for input that does not fit in memory.
+    `chunk_source` is a callable returning a fresh iterable of frames, e.g.
+    ``lambda: pd.read_csv(path, chunksize=1_000_000)``. Memory stays bounded
+    by the number of distinct customers rather than the number of rows. When
+    a window is given without `as_of`, the input is read twice.
+    """
+    if as_of is None:
+        as_of = max(_read_chunk(chunk)['order_purchase_timestamp'].max() for chunk in chunk_source())
+    start = _window_start(as_of, window)
+
+    partials, partial_rows = [], 0
+    for chunk in chunk_source():
+        partial = _partial_aggregate(_read_chunk(chunk), start)
+        partials.append(partial)
+        partial_rows += len(partial)
+        if partial_rows > _COMPACT_ROWS:
+            partials = [_merge_partials(partials)]
+            partial_rows = len(partials[0])
+    return _finish(_merge_partials(partials), as_of)
+
+
+def _quantile_score(values, bins, ascending):
+    """
+    Score values from 1 to `bins` by rank. Tied values share the score of
+    the lowest position they occupy, so a value held by most customers
+    (such as a single order) gets the lowest score instead of being spread
+    over every bucket by row order. A constant column scores the middle.
+    """
+    if values.nunique() <= 1:
+        return pd.Series((bins + 1) // 2, index=values.index, dtype=np.int8)
+    ranks = values.rank(method='min', ascending=ascending)
+    return ((ranks - 1) * bins // len(values) + 1).astype(np.int8)
+
+
+def score_rfm(rfm, bins=5):
+    """
+    Add R/F/M quintile scores and a named segment to an RFM frame.
+    """
+    scored = rfm.copy()
+    # A lower recency is better, so rank it descending
+    scored['r_score'] = _quantile_score(rfm['recency'], bins, ascending=False)
+    scored['f_score'] = _quantile_score(rfm['frequency'], bins, ascending=True)
+    scored['m_score'] = _quantile_score(rfm['monetary'], bins, ascending=True)
+
+    r, f, m = scored['r_score'], scored['f_score'], scored['m_score']
+    names = [name for name, _ in SEGMENTS]
+    conditions = [rule(r, f, m) for _, rule in SEGMENTS]
+    scored['segment'] = pd.Categorical(
+        np.select(conditions, names, default="Hibernating"),
+        categories=names + ["Hibernating"],
+    )
+    return scored
+
+
+def compute_rfm(df, window=None, as_of=None, bins=5):
+    """
+    Score every customer in a frame of order rows.
+    """
+    return score_rfm(aggregate_rfm(df, window=window, as_of=as_of), bins=bins)
+
+
+def cached_rfm(key, df, window=None):
+    """
+    Scored RFM for a filtered frame, shared across sessions and tab switches.
+    `key` must identify both the dataset version and the filter selection.
+    """
+    return _results_cache.get_or_create(key, lambda: compute_rfm(df, window=window))
+
+
+def store_rfm(key, rfm):
+    """
+    Add a scored RFM computed elsewhere, e.g. by a warm-up worker, under the
+    key `cached_rfm` would use for it.
+    """
+    _results_cache.put(key, rfm)
+
+
+def top_customers(rfm, column, k=5, ascending=False):
+    """
+    The k customers with the highest (or lowest) value of a column, using a
+    partial selection instead of a full sort.
+    """
+    top = rfm.nsmallest(k, column) if ascending else rfm.nlargest(k, column)
+    # Convert only the k selected labels, not every category of the index
+    top.index = pd.Index([str(label) for label in top.index], name=top.index.name)
+    return top
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Number of set bits for every byte value, used to count customers in a bitmap
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _codes(series):
+    """
+    Integer codes and labels for a column, reusing categorical codes when present.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    codes, labels = pd.factorize(series, sort=True)
+    return codes, pd.Index(labels)
+
+
+def _build_bitmaps(group_idx, customer_idx, n_groups, n_customers):
+    """
+    Pack the customers seen in each group into one bit per customer.
+    """
+    n_customers = max(n_customers, 1)
+    n_bytes = (n_customers + 7) // 8
+    # Deduplicate (group, customer) pairs so summing bit values equals OR-ing them
+    pairs = np.unique(group_idx.astype(np.int64) * n_customers + customer_idx)
+    groups, customers = np.divmod(pairs, n_customers)
+    byte_idx = groups * n_bytes + (customers >> 3)
+    bit_values = np.left_shift(1, 7 - (customers & 7))
+    flat = np.bincount(byte_idx, weights=bit_values, minlength=n_groups * n_bytes)
+    return flat.astype(np.uint8).reshape(n_groups, n_bytes)
+
+
+class MonthlyRollup:
+    """
+    Monthly sales cube, optionally split by one extra dimension (state,
+    category, ...). Each cell keeps sales, order count and an exact bitmap of
+    the customers seen, so distinct customers stay correct when cells are
+    combined across months or dimension values.
+    """
+
+    def __init__(self, df, by=None):
+        month_idx, self.months = _codes(df['order_month'])
+        customer_idx, customers = _codes(df['customer_id'])
+        self.by = by
+        if by is None:
+            self.by_values = pd.Index([None])
+            by_idx = np.zeros(len(df), dtype=np.int64)
+        else:
+            by_idx, self.by_values = _codes(df[by])
+
+        # Rows with a missing month, dimension value or customer are left out of the cube
+        valid = (month_idx >= 0) & (by_idx >= 0) & (customer_idx >= 0)
+        month_idx, by_idx, customer_idx = month_idx[valid], by_idx[valid], customer_idx[valid]
+        payments = df['payment_value'].to_numpy()[valid]
+        has_order = df['order_id'].notna().to_numpy()[valid]
+
+        n_by = len(self.by_values)
+        n_cells = len(self.months) * n_by
+        cell_idx = month_idx.astype(np.int64) * n_by + by_idx
+
+        shape = (len(self.months), n_by)
+        self.sales = np.bincount(cell_idx, weights=np.nan_to_num(payments), minlength=n_cells).reshape(shape)
+        self.orders = np.bincount(cell_idx, weights=has_order, minlength=n_cells).astype(np.int64).reshape(shape)
+        self.bitmaps = _build_bitmaps(cell_idx, customer_idx, n_cells, len(customers)).reshape(shape + (-1,))
+
+    def _by_mask(self, by_values):
+        if by_values is None:
+            return np.ones(len(self.by_values), dtype=bool)
+        return self.by_values.isin(by_values)
+
+    def monthly(self, month_mask=None, by_values=None):
+        """
+        Per-month sales, orders, distinct customers and average spending per
+        customer for the selected months and dimension values.
+        """
+        if month_mask is None:
+            month_mask = np.ones(len(self.months), dtype=bool)
+        by_mask = self._by_mask(by_values)
+
+        sales = self.sales[month_mask][:, by_mask].sum(axis=1)
+        orders = self.orders[month_mask][:, by_mask].sum(axis=1)
+        merged = np.bitwise_or.reduce(self.bitmaps[month_mask][:, by_mask], axis=1)
+        customers = _POPCOUNT[merged].sum(axis=1, dtype=np.int64)
+
+        monthly = pd.DataFrame({
+            'payment_value': sales,
+            'order_id': orders,
+            'customer_id': customers,
+        }, index=pd.Index(self.months[month_mask], name='order_month'))
+        # Mean of per-customer monthly totals equals monthly sales over monthly customers
+        monthly['avg_sales_per_customer'] = monthly['payment_value'] / monthly['customer_id'].replace(0, np.nan)
+        return monthly
+
+    def unique_customers(self, month_mask=None, by_values=None):
+        """
+        Exact number of distinct customers across all selected cells.
+        """
+        if month_mask is None:
+            month_mask = np.ones(len(self.months), dtype=bool)
+        cells = self.bitmaps[month_mask][:, self._by_mask(by_values)]
+        if cells.size == 0:
+            return 0
+        merged = np.bitwise_or.reduce(cells.reshape(-1, cells.shape[-1]), axis=0)
+        return int(_POPCOUNT[merged].sum(dtype=np.int64))
+
+
+def build_monthly_rollup(df, by=None):
+    """
+    Build the monthly rollup for an orders/items/payments frame.
+    """
+    return MonthlyRollup(df, by=by)
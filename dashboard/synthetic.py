@@ -0,0 +1,327 @@
+"""
+Synthetic Olist-shaped data for benchmarks and load tests.
+
+    python dashboard/synthetic.py 50000000 /tmp/synthetic
+
+Orders are generated in ranges of order IDs, in purchase order, and every
+range is written out before the next one is generated, so memory stays
+bounded by the chunk size at any scale. The CSVs have the columns of the
+tables built by etl.py, with 32-digit hex IDs like Olist's.
+"""
+import argparse
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+
+from data_loader import DATASETS
+
+STATES = np.array(["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "DF", "GO", "ES", "PE", "CE", "PA", "MT", "MA"])
+# Capital of every state above, used as the city of its customers
+CITIES = np.array([
+    "sao paulo", "rio de janeiro", "belo horizonte", "porto alegre", "curitiba", "florianopolis", "salvador",
+    "brasilia", "goiania", "vitoria", "recife", "fortaleza", "belem", "cuiaba", "sao luis",
+])
+PAYMENT_TYPES = np.array(["credit_card", "boleto", "voucher", "debit_card"])
+PAYMENT_WEIGHTS = [0.74, 0.19, 0.055, 0.015]
+CATEGORIES = np.array([f"category_{i}" for i in range(71)])
+# Most reviews have no comment, which the ETL fills with "Unknown"
+REVIEW_TITLES = np.array(["Unknown", "recomendo", "otimo", "bom", "ruim", "nao recebi"])
+REVIEW_MESSAGES = np.array([
+    "Unknown", "Produto chegou antes do prazo", "Muito bom, recomendo", "Entrega atrasada",
+    "Produto diferente do anunciado", "Ainda nao recebi o produto",
+])
+START = pd.Timestamp("2016-10-01")
+END = pd.Timestamp("2018-09-01")
+DAY = 86_400 * 10**9
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Columns of the tables written by etl.py
+ORDERS_ITEMS_PAYMENTS_COLUMNS = [
+    "order_id", "order_item_id", "product_id", "seller_id", "shipping_limit_date", "price", "freight_value",
+    "payment_sequential", "payment_type", "payment_installments", "payment_value", "customer_id", "order_status",
+    "order_purchase_timestamp", "order_approved_at", "order_delivered_carrier_date",
+    "order_delivered_customer_date", "order_estimated_delivery_date", "order_month",
+    "product_category_name_english", "seller_state",
+]
+RFM_COLUMNS = ORDERS_ITEMS_PAYMENTS_COLUMNS + [
+    "customer_unique_id", "customer_zip_code_prefix", "customer_city", "customer_state",
+]
+ORDER_REVIEWS_COLUMNS = [
+    "order_id", "customer_id", "order_status", "order_purchase_timestamp", "order_approved_at",
+    "order_delivered_carrier_date", "order_delivered_customer_date", "order_estimated_delivery_date",
+    "review_id", "review_score", "review_comment_title", "review_comment_message", "review_creation_date",
+    "review_answer_timestamp", "delivery_time",
+]
+# ID columns, generated as integer indexes, and the salt of their hex form
+ID_SALTS = {"order_id": 1, "customer_id": 3, "product_id": 5, "seller_id": 7, "review_id": 9, "customer_unique_id": 11}
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+def _sizes(n_rows):
+    """
+    Numbers of orders, customers, products and sellers for `n_rows` rows.
+    """
+    n_orders = max(n_rows * 5 // 6, 1)
+    n_customers = max(n_orders * 19 // 20, 1)
+    n_products = max(min(n_rows // 3, 33_000), 1)
+    n_sellers = max(min(n_rows // 30, 3_100), 1)
+    return n_orders, n_customers, n_products, n_sellers
+
+
+def _mix(values, salt):
+    """
+    Hash integers to uint64 (splitmix64). It is a bijection, so distinct
+    values keep distinct hashes, and it gives every chunk the same
+    attributes for the same customer, product or seller.
+    """
+    x = values.astype(np.uint64) + np.uint64(salt << 32)
+    x += np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _pick(values, salt, count):
+    """
+    A fixed code in [0, count) for every value.
+    """
+    return (_mix(values, salt) % np.uint64(count)).astype(np.int64)
+
+
+def _hex_ids(values, salt):
+    """
+    32-digit hex IDs for integer indexes, as an Arrow string array built
+    straight from the digit bytes, without a Python string per row.
+    """
+    words = np.stack([_mix(values, salt), _mix(values, salt + 1)], axis=1)
+    nibbles = words.view(np.uint8)
+    digits = np.empty((len(values), 32), dtype=np.uint8)
+    digits[:, 0::2] = HEX_DIGITS[nibbles >> 4]
+    digits[:, 1::2] = HEX_DIGITS[nibbles & 15]
+    offsets = np.arange(0, 32 * len(values) + 1, 32, dtype=np.int32)
+    return pa.StringArray.from_buffers(len(values), pa.py_buffer(offsets), pa.py_buffer(digits))
+
+
+def _timestamps(nanoseconds):
+    return nanoseconds.view("datetime64[ns]")
+
+
+def generate_chunks(n_rows, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield (orders_items_payments, order_reviews) frames for consecutive
+    ranges of order IDs, together roughly `n_rows` item/payment rows.
+    IDs are integer indexes; every other column is typed as the loader
+    would type it. Each range draws from its own random generator, so a
+    chunk does not depend on the ones before it.
+    """
+    n_orders, n_customers, n_products, n_sellers = _sizes(n_rows)
+    # Every order has one item/payment row plus a Poisson number of extra ones
+    extra_rows = max(n_rows - n_orders, 0) / n_orders
+    orders_per_chunk = max(chunk_rows * n_orders // max(n_rows, 1), 1)
+    span = (END - START).value
+
+    for number, first in enumerate(range(0, n_orders, orders_per_chunk)):
+        rng = np.random.default_rng([seed, number])
+        order = np.arange(first, min(first + orders_per_chunk, n_orders))
+        n = len(order)
+
+        # Purchase times rise with the order ID, skewed towards the end of the period like the growth in the real data
+        purchased = START.value + (np.sqrt((order + rng.random(n)) / n_orders) * span).astype(np.int64)
+        purchased -= purchased % 10**9  # whole seconds, like the source data
+        customer = rng.integers(0, n_customers, n)
+        delivery_days = np.clip(rng.gamma(2.5, 5, n), 1, 200).astype(np.int64)
+        approved = purchased + rng.integers(10 * 60, 2 * 3600, n) * 10**9
+        carrier = purchased + (delivery_days * rng.uniform(0.2, 0.6, n) * 86_400).astype(np.int64) * 10**9
+        delivered = purchased + delivery_days * DAY + rng.integers(0, 12 * 3600, n) * 10**9
+        estimated = purchased + np.maximum(delivery_days + rng.integers(-3, 15, n), 2) * DAY
+        estimated -= estimated % DAY
+        # One payment per order covering all of its items, repeated on every item row as in the ETL join
+        payment_type = rng.choice(len(PAYMENT_TYPES), n, p=PAYMENT_WEIGHTS)
+        installments = np.where(payment_type == 0, rng.integers(1, 11, n), 1)
+
+        items = 1 + rng.poisson(extra_rows, n)
+        starts = np.cumsum(items) - items
+        row = np.repeat(np.arange(n), items)
+        n_items = len(row)
+        product = rng.integers(0, n_products, n_items)
+        seller = rng.integers(0, n_sellers, n_items)
+        price = (0.85 + rng.gamma(1.5, 80, n_items)).round(2)
+        freight = rng.gamma(2, 10, n_items).round(2)
+        payment_value = np.add.reduceat(price + freight, starts).round(2)
+
+        orders_items_payments = pd.DataFrame({
+            'order_id': order[row],
+            'order_item_id': np.arange(n_items) - starts[row] + 1,
+            'product_id': product,
+            'seller_id': seller,
+            'shipping_limit_date': _timestamps(purchased[row] + 6 * DAY),
+            'price': price,
+            'freight_value': freight,
+            'payment_sequential': np.ones(n_items, dtype=np.int64),
+            'payment_type': pd.Categorical.from_codes(payment_type[row], categories=PAYMENT_TYPES),
+            'payment_installments': installments[row],
+            'payment_value': payment_value[row],
+            'customer_id': customer[row],
+            'order_status': pd.Categorical.from_codes(np.zeros(n_items, dtype=np.int8), categories=["delivered"]),
+            'order_purchase_timestamp': _timestamps(purchased[row]),
+            'order_approved_at': _timestamps(approved[row]),
+            'order_delivered_carrier_date': _timestamps(carrier[row]),
+            'order_delivered_customer_date': _timestamps(delivered[row]),
+            'order_estimated_delivery_date': _timestamps(estimated[row]),
+            'order_month': _timestamps(purchased[row]).astype("datetime64[M]").astype("datetime64[ns]"),
+            'product_category_name_english': pd.Categorical.from_codes(
+                _pick(product, 13, len(CATEGORIES)), categories=CATEGORIES
+            ),
+            'seller_state': pd.Categorical.from_codes(_pick(seller, 15, len(STATES)), categories=STATES),
+        })
+
+        # Reviews: one per order, with scores falling as delivery takes longer
+        score = 5 - delivery_days / 12 + rng.normal(0, 1.2, n)
+        created = delivered - delivered % DAY + DAY
+        title = np.where(rng.random(n) < 0.12, rng.integers(1, len(REVIEW_TITLES), n), 0)
+        message = np.where(rng.random(n) < 0.41, rng.integers(1, len(REVIEW_MESSAGES), n), 0)
+        order_reviews = pd.DataFrame({
+            'order_id': order,
+            'customer_id': customer,
+            'order_status': pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=["delivered"]),
+            'order_purchase_timestamp': _timestamps(purchased),
+            'order_approved_at': _timestamps(approved),
+            'order_delivered_carrier_date': _timestamps(carrier),
+            'order_delivered_customer_date': _timestamps(delivered),
+            'order_estimated_delivery_date': _timestamps(estimated),
+            'review_id': order,
+            'review_score': np.clip(np.rint(score), 1, 5).astype(np.int64),
+            'review_comment_title': pd.Categorical.from_codes(title, categories=REVIEW_TITLES),
+            'review_comment_message': pd.Categorical.from_codes(message, categories=REVIEW_MESSAGES),
+            'review_creation_date': _timestamps(created),
+            'review_answer_timestamp': _timestamps(created + rng.integers(3600, 3 * 86_400, n) * 10**9),
+            'delivery_time': delivery_days,
+        })
+        yield orders_items_payments, order_reviews
+
+
+def _category_totals(orders_items_payments):
+    return orders_items_payments.groupby('product_category_name_english', observed=True)['price'].agg(['sum', 'count'])
+
+
+def _avg_popularity_products(totals):
+    """
+    avg_popularity_product from per-chunk price totals, as the ETL builds it.
+    """
+    totals = pd.concat(totals).groupby(level=0).sum()
+    return pd.DataFrame({
+        'product_category_name_english': totals.index.astype(str),
+        'price': (totals['sum'] / totals['count']).to_numpy(),
+        'product_id': totals['count'].to_numpy(),
+    }).sort_values('price', ascending=False, ignore_index=True)
+
+
+def generate(n_rows, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Synthetic data with roughly `n_rows` order item/payment rows, in memory.
+    Returns frames keyed like `data_loader.DATASETS` and typed as the loader
+    would type them, except that ID categoricals are labelled by integer
+    index rather than by hex string, which keeps their categories small.
+    """
+    n_orders, n_customers, n_products, n_sellers = _sizes(n_rows)
+    counts = {'order_id': n_orders, 'customer_id': n_customers, 'product_id': n_products,
+              'seller_id': n_sellers, 'review_id': n_orders}
+    chunks = {'orders_items_payments': [], 'order_reviews': []}
+    totals = []
+    for orders_items_payments, order_reviews in generate_chunks(n_rows, seed, chunk_rows):
+        totals.append(_category_totals(orders_items_payments))
+        for name, chunk in [('orders_items_payments', orders_items_payments), ('order_reviews', order_reviews)]:
+            chunks[name].append(chunk.astype({column: np.int32 for column in counts if column in chunk}))
+
+    datasets = {}
+    for name, frames in chunks.items():
+        df = pd.concat(frames, ignore_index=True)
+        frames.clear()
+        for column, count in counts.items():
+            if column in df:
+                df[column] = pd.Categorical.from_codes(df[column].to_numpy(), categories=pd.RangeIndex(count))
+        datasets[name] = df
+    datasets['avg_popularity_products'] = _avg_popularity_products(totals)
+    return datasets
+
+
+def _csv_table(df):
+    """
+    A generated chunk as an Arrow table in the form the ETL writes it: hex
+    IDs, "YYYY-MM" months, timestamps in whole seconds and plain strings.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        if name in ID_SALTS:
+            column = _hex_ids(df[name].to_numpy(), ID_SALTS[name])
+        elif name == "order_month":
+            column = pc.strftime(column, "%Y-%m")
+        elif pa.types.is_timestamp(column.type):
+            column = column.cast(pa.timestamp("s"))
+        elif pa.types.is_dictionary(column.type):
+            column = column.cast(pa.string())
+        columns.append(column)
+    return pa.table(columns, names=table.column_names)
+
+
+def write_csv(n_rows, out_dir, seed=0, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Generate roughly `n_rows` rows straight into the CSVs the dashboard
+    reads, so the app can be pointed at them with ECOMMERCE_DATA_DIR.
+    Chunks are written with Arrow's CSV writer, which formats them without
+    creating Python objects. Returns the number of item/payment rows written.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    totals = []
+    with ExitStack() as stack:
+        writers = {}
+        for orders_items_payments, order_reviews in generate_chunks(n_rows, seed, chunk_rows):
+            totals.append(_category_totals(orders_items_payments))
+            # rfm_df is orders_items_payments joined with customers; their attributes follow from the customer index
+            customer = orders_items_payments['customer_id'].to_numpy()
+            state = _pick(customer, 17, len(STATES))
+            rfm = _csv_table(orders_items_payments.assign(
+                customer_unique_id=customer,
+                customer_zip_code_prefix=1000 + _pick(customer, 19, 99_000),
+                customer_city=pd.Categorical.from_codes(state, categories=CITIES),
+                customer_state=pd.Categorical.from_codes(state, categories=STATES),
+            ))
+            tables = {
+                'orders_items_payments': rfm.select(ORDERS_ITEMS_PAYMENTS_COLUMNS),
+                'rfm': rfm.select(RFM_COLUMNS),
+                'order_reviews': _csv_table(order_reviews).select(ORDER_REVIEWS_COLUMNS),
+            }
+            for name, table in tables.items():
+                if name not in writers:
+                    writers[name] = stack.enter_context(
+                        pcsv.CSVWriter(str(out_dir / DATASETS[name]), table.schema)
+                    )
+                writers[name].write_table(table)
+            rows += len(orders_items_payments)
+
+    _avg_popularity_products(totals).to_csv(out_dir / DATASETS['avg_popularity_products'], index=False)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic Olist-shaped CSVs for the dashboard.")
+    parser.add_argument("rows", type=int, help="number of order item/payment rows")
+    parser.add_argument("out_dir", type=Path, help="directory to write the CSVs to")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="rows generated and written at a time")
+    args = parser.parse_args(argv)
+    rows = write_csv(args.rows, args.out_dir, seed=args.seed, chunk_rows=args.chunk_rows)
+    print(f"Wrote {rows:,} order item/payment rows to {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Warm-up of the dashboard caches, run once per Streamlit process before the
+first session renders.
+
+    python dashboard/warmup.py --per-year
+    python dashboard/warmup.py --workers 1
+    python dashboard/warmup.py --workers 4 --process-min-rows 0
+
+The source tables and their filter indexes are loaded on a thread pool.
+The expensive results of the sections for the default filter (and, with
+--per-year or DASHBOARD_WARMUP_PER_YEAR=1, for every single year) are
+then computed on threads, or inline with --workers 1, and stored in the
+caches the sections read from. Worker processes are used only when the
+orders table has at least DASHBOARD_WARMUP_PROCESS_MIN_ROWS rows (or
+--process-min-rows); each of them loads the data and builds the filter
+index again and pickles its results back, which costs more than the
+tasks themselves on the data sizes measured so far.
+"""
+import argparse
+import functools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+import profiling
+from correlation import delivery_satisfaction, store_delivery_satisfaction
+from data_loader import dataset_version, load_derived
+from filters import build_filter_index, selection_key
+from rfm import WINDOWS, compute_rfm, store_rfm
+from rollup import build_monthly_rollup
+
+# Warm-up runs unless DASHBOARD_WARMUP=0
+WARMUP_ENV = "DASHBOARD_WARMUP"
+WARMUP_WORKERS = int(os.environ.get("DASHBOARD_WARMUP_WORKERS", os.cpu_count() or 1))
+WARMUP_PER_YEAR = os.environ.get("DASHBOARD_WARMUP_PER_YEAR", "").lower() in ("1", "true", "yes")
+# Orders table rows from which section results are computed in worker processes. Unset, they never
+# are: up to 4M rows a worker's own load and index plus pickling its results took longer than the tasks.
+WARMUP_PROCESS_MIN_ROWS = (
+    int(os.environ["DASHBOARD_WARMUP_PROCESS_MIN_ROWS"]) if os.environ.get("DASHBOARD_WARMUP_PROCESS_MIN_ROWS") else None
+)
+
+# Datasets the unified filter applies to, and every dataset the dashboard reads
+FILTERED_DATASETS = ["orders_items_payments", "order_reviews"]
+DASHBOARD_DATASETS = FILTERED_DATASETS + ["avg_popularity_products"]
+# Window selected by default in the RFM dashboard
+DEFAULT_WINDOW = next(iter(WINDOWS))
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_warmed = False
+
+
+def _load(name):
+    if name in FILTERED_DATASETS:
+        load_derived(name, "filter_index", build_filter_index)
+    else:
+        dataset_version(name)
+
+
+def _rollup_task():
+    rollup = load_derived("orders_items_payments", "monthly_rollup", build_monthly_rollup)
+    return 'rollup', dataset_version("orders_items_payments"), None, rollup
+
+
+def _correlation_task(filter_key):
+    index = load_derived("order_reviews", "filter_index", build_filter_index)
+    result = delivery_satisfaction(index.select(*filter_key))
+    return 'correlation', dataset_version("order_reviews"), filter_key, result
+
+
+def _rfm_task(window_label, filter_key):
+    index = load_derived("orders_items_payments", "filter_index", build_filter_index)
+    rfm = compute_rfm(index.select(*filter_key), window=WINDOWS[window_label])
+    return 'rfm', dataset_version("orders_items_payments"), (window_label, filter_key), rfm
+
+
+def _store(kind, version, key, value):
+    """
+    Put a task result where its section looks for it, keyed as the section
+    keys it. Results computed from an older version of a dataset are dropped.
+    """
+    if kind == 'rollup':
+        if version == dataset_version("orders_items_payments"):
+            load_derived("orders_items_payments", "monthly_rollup", lambda df: value)
+    elif kind == 'correlation':
+        store_delivery_satisfaction((version, key), value)
+    elif kind == 'rfm':
+        window_label, filter_key = key
+        store_rfm((version, window_label, filter_key), value)
+
+
+@contextmanager
+def _plain_main():
+    """
+    Hide this process's __main__ module while worker processes start.
+    Spawned workers re-import it, and under Streamlit it is the dashboard
+    script, which would render every section again in each worker.
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def _submit(pool, pending):
+    return {pool.submit(func, *args): (func, args) for func, args in pending}
+
+
+def _finish(task, result, pending, stored):
+    """
+    Store the result of a finished task, which `result()` returns or
+    raises. Every task that finishes, successfully or not, is removed from
+    `pending`, so a broken pool leaves only the unfinished ones behind.
+    """
+    try:
+        value = result()
+    except BrokenProcessPool:
+        raise
+    except Exception:
+        # The section computes the result itself on first view and reports any error there
+        logger.exception("Warm-up task %s%r failed", task[0].__name__, task[1])
+    else:
+        _store(*value)
+        stored.append(value[:3])
+    pending.remove(task)
+
+
+def _collect(futures, pending, stored):
+    """
+    Store the results of submitted tasks as they finish.
+    """
+    for future in as_completed(futures):
+        _finish(futures[future], future.result, pending, stored)
+
+
+def _run_tasks(tasks, workers, processes=False):
+    """
+    Run (function, args) tasks and store their results: inline with one
+    worker, otherwise on a thread pool, or with `processes` on a process
+    pool, finishing on threads where worker processes cannot be started or
+    break. Workers come from a fork server rather than from this
+    multi-threaded server process; they import this module once through the
+    fork server and map the same Arrow files as this process.
+    """
+    pending = list(tasks)
+    stored = []
+    if processes and workers > 1:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if context.get_start_method() == "forkserver":
+            context.set_forkserver_preload([__name__])
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as pool:
+                with _plain_main():
+                    # Workers start as tasks are submitted, all of them before the first result
+                    futures = _submit(pool, pending)
+                _collect(futures, pending, stored)
+        except (BrokenProcessPool, OSError):
+            logger.warning("Warm-up worker processes failed, finishing %d tasks on threads", len(pending), exc_info=True)
+    if workers > 1 and pending:
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            _collect(_submit(pool, pending), pending, stored)
+    for func, args in list(pending):
+        _finish((func, args), functools.partial(func, *args), pending, stored)
+    return len(stored)
+
+
+def warm(per_year=WARMUP_PER_YEAR, workers=WARMUP_WORKERS, process_min_rows=WARMUP_PROCESS_MIN_ROWS):
+    """
+    Load every dataset and precompute the default-filter section results.
+    Returns the wall time of both stages, how the results were computed and
+    the number of results stored.
+    """
+    timings = {}
+    start = time.perf_counter()
+    with profiling.stage("warmup:load"):
+        with ThreadPoolExecutor(max_workers=max(min(workers, len(DASHBOARD_DATASETS)), 1)) as pool:
+            for future in [pool.submit(_load, name) for name in DASHBOARD_DATASETS]:
+                future.result()
+    timings['load_seconds'] = round(time.perf_counter() - start, 6)
+
+    # Section results for the default selection of the unified filter, i.e. everything
+    index = load_derived("orders_items_payments", "filter_index", build_filter_index)
+    months = index.available_months
+    filter_keys = [selection_key(index.available_years, months)]
+    if per_year:
+        filter_keys += [selection_key([year], months) for year in index.available_years]
+
+    tasks = [(_rollup_task, ())]
+    for filter_key in filter_keys:
+        tasks.append((_correlation_task, (filter_key,)))
+        tasks.append((_rfm_task, (DEFAULT_WINDOW, filter_key)))
+
+    processes = process_min_rows is not None and len(index.frame) >= process_min_rows
+    timings['mode'] = "inline" if workers <= 1 else "processes" if processes else "threads"
+    start = time.perf_counter()
+    with profiling.stage("warmup:sections"):
+        timings['results'] = _run_tasks(tasks, workers, processes)
+    timings['sections_seconds'] = round(time.perf_counter() - start, 6)
+    return timings
+
+
+def ensure_warm():
+    """
+    Warm the caches once per process. Sessions arriving while the warm-up
+    runs wait for it rather than computing the same results themselves.
+    """
+    global _warmed
+    if _warmed or os.environ.get(WARMUP_ENV, "1") == "0":
+        return
+    with _lock:
+        if not _warmed:
+            warm()
+            _warmed = True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load the dashboard data and precompute the section results.")
+    parser.add_argument("--per-year", action="store_true", help="also precompute every single-year selection")
+    parser.add_argument("--workers", type=int, default=WARMUP_WORKERS, help="threads or processes to use; 1 runs inline")
+    parser.add_argument("--process-min-rows", type=int, default=WARMUP_PROCESS_MIN_ROWS,
+                        help="orders table rows from which worker processes are used instead of threads")
+    args = parser.parse_args(argv)
+
+    timings = warm(per_year=args.per_year, workers=args.workers, process_min_rows=args.process_min_rows)
+    print(f"Loaded {len(DASHBOARD_DATASETS)} datasets in {timings['load_seconds']:.3f} s")
+    print(f"Precomputed {timings['results']} section results in {timings['sections_seconds']:.3f} s ({timings['mode']})")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run from the importable module, so worker processes can find the task functions
+    from warmup import main
+    sys.exit(main())